@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -36,4 +38,17 @@ assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts'])
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
+    'tests.fixtures.fixture_queries',
 ]
+
+
+@pytest.fixture(autouse=True, scope='session')
+def temporary_cache(tmp_path_factory):
+    """Двухуровневый кеш тестов во временном каталоге, а не в файле проекта."""
+    from django.test.utils import override_settings
+
+    from core.test_runner import temporary_caches
+
+    directory = tmp_path_factory.mktemp('cache')
+    with override_settings(CACHES=temporary_caches(directory)):
+        yield
@@ -0,0 +1,8 @@
+import pytest
+from posts.tests.utils import assert_query_budget
+
+
+@pytest.fixture
+def query_budget(db):
+    """Проверка, что страница укладывается в свой бюджет SQL-запросов."""
+    return assert_query_budget
@@ -0,0 +1,28 @@
+import pytest
+from mixer.backend.django import mixer
+
+from posts.models import Follow, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('posts_count', [1, 20])
+    def test_index_query_budget(self, client, query_budget, posts_count):
+        mixer.cycle(posts_count).blend(Post, image='')
+        query_budget(client, '/', 4)
+
+    @pytest.mark.parametrize('posts_count', [1, 20])
+    def test_group_query_budget(self, client, query_budget, group,
+                                posts_count):
+        mixer.cycle(posts_count).blend(Post, group=group, image='')
+        query_budget(client, f'/group/{group.slug}/', 6)
+
+    @pytest.mark.parametrize('posts_count', [1, 20])
+    def test_follow_query_budget(self, user_client, user, another_user,
+                                 query_budget, posts_count):
+        Follow.objects.create(user=user, author=another_user)
+        mixer.cycle(posts_count).blend(Post, author=another_user, image='')
+        # После очистки кеша подписки ещё читаются в граф.
+        query_budget(user_client, '/follow/', 6)
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import checks
+
+        if settings.STARTUP_SELF_CHECK:
+            checks.startup_self_check()
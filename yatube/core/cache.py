@@ -0,0 +1,419 @@
+"""Двухуровневый кеш: LRU в памяти процесса поверх общего SQLite-файла.
+
+L1 живёт в памяти процесса и ограничен по размеру в байтах. L2 - файл
+SQLite, общий для всех worker-процессов на машине. Каждая запись в L2
+попадает в журнал инвалидаций, а процессы перед чтением из L1 сверяют
+``PRAGMA data_version`` и, если база менялась другим соединением,
+вычищают из L1 изменённые ключи. Внешние сервисы не нужны.
+
+Пример настройки::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'L1_MAX_BYTES': 8 * 1024 * 1024},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core import timing
+
+
+# Сколько секунд хранить журнал инвалидаций. Процесс, который не
+# обращался к кешу дольше, полностью очищает свой L1.
+INVALIDATION_LOG_TTL = 300
+# Процесс чистит просроченные ключи и журнал после каждой CULL_EVERY
+# своей записи, но не реже раза в CULL_SECONDS, если вообще пишет.
+CULL_EVERY = 1000
+CULL_SECONDS = 60
+CLEAR_ALL = '*'
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entry ('
+    ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry(expires)',
+    'CREATE TABLE IF NOT EXISTS cache_invalidation ('
+    ' seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL,'
+    ' origin TEXT NOT NULL, created REAL NOT NULL)',
+)
+
+
+class LocalStore:
+    """LRU-хранилище L1 одного процесса с лимитом в байтах."""
+
+    def __init__(self, max_bytes):
+        self.pid = os.getpid()
+        self.origin = uuid.uuid4().hex
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.last_seq = None
+        self.writes = 0
+        self.culled_at = time.time()
+        self.lock = threading.RLock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                self.discard(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, pickled, expires):
+        # Крупные значения не должны вытеснять весь L1 разом.
+        if len(pickled) > self.max_bytes // 4:
+            self.discard(key)
+            return
+        with self.lock:
+            self.discard(key)
+            self.entries[key] = (pickled, expires)
+            self.size += len(pickled)
+            while self.size > self.max_bytes:
+                _, (old, _) = self.entries.popitem(last=False)
+                self.size -= len(old)
+
+    def discard(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= len(entry[0])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_local_store(location, max_bytes):
+    """L1 общий для всех потоков процесса; после fork создаётся заново."""
+    with _stores_lock:
+        store = _stores.get(location)
+        if store is None or store.pid != os.getpid():
+            store = _stores[location] = LocalStore(max_bytes)
+        return store
+
+
+class TwoTierCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._location = os.path.abspath(location)
+        self._l1_max_bytes = int(options.get('L1_MAX_BYTES', 4 * 1024 * 1024))
+        self._max_entries = int(options.get('MAX_ENTRIES', 100000))
+        self._local = threading.local()
+
+    @property
+    def _store(self):
+        return get_local_store(self._location, self._l1_max_bytes)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # Соединение SQLite нельзя использовать после fork.
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._location)
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._location, timeout=10, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.data_version = None
+        return connection
+
+    def _sync(self):
+        """Вычищает из L1 ключи, изменённые другими процессами."""
+        connection = self._connection()
+        data_version = connection.execute('PRAGMA data_version').fetchone()[0]
+        store = self._store
+        if data_version == self._local.data_version and (
+                store.last_seq is not None):
+            return
+        self._local.data_version = data_version
+        with store.lock:
+            last_issued = self._last_issued_seq(connection)
+            if store.last_seq is None:
+                store.last_seq = last_issued
+                return
+            rows = connection.execute(
+                'SELECT seq, key, origin FROM cache_invalidation '
+                'WHERE seq > ? ORDER BY seq', (store.last_seq,)
+            ).fetchall()
+            first_seq = rows[0][0] if rows else last_issued + 1
+            if last_issued > store.last_seq and (
+                    first_seq > store.last_seq + 1):
+                # Журнал уже обрезан, возможно целиком: что пропущено,
+                # неизвестно.
+                store.clear()
+                store.last_seq = last_issued
+            for seq, key, origin in rows:
+                if origin == store.origin:
+                    continue
+                if key == CLEAR_ALL:
+                    store.clear()
+                else:
+                    store.discard(key)
+            if rows:
+                store.last_seq = rows[-1][0]
+
+    @staticmethod
+    def _last_issued_seq(connection):
+        """Последний выданный номер журнала, даже если строка удалена.
+
+        AUTOINCREMENT хранит его в sqlite_sequence, cull его не трогает.
+        """
+        row = connection.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = ?',
+            ('cache_invalidation',)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _log(self, connection, keys):
+        now = time.time()
+        connection.executemany(
+            'INSERT INTO cache_invalidation (key, origin, created) '
+            'VALUES (?, ?, ?)',
+            [(key, self._store.origin, now) for key in keys]
+        )
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _fetch(self, connection, keys):
+        """Читает живые записи L2 и кладёт их в L1."""
+        found = {}
+        now = time.time()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = connection.execute(
+                'SELECT key, value, expires FROM cache_entry '
+                f'WHERE key IN ({placeholders})', chunk
+            ).fetchall()
+            for key, value, expires in rows:
+                if expires is not None and expires <= now:
+                    continue
+                self._store.put(key, bytes(value), expires)
+                found[key] = bytes(value)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._sync()
+        pickled = self._store.get(key)
+        if pickled is None:
+            pickled = self._fetch(self._connection(), [key]).get(key)
+        if pickled is None:
+            timing.count('cache_misses')
+            return default
+        timing.count('cache_hits')
+        return pickle.loads(pickled)
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        self._sync()
+        found = {}
+        missing = []
+        for key in made:
+            pickled = self._store.get(key)
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickled
+        if missing:
+            found.update(self._fetch(self._connection(), missing))
+        timing.count('cache_hits', len(found))
+        timing.count('cache_misses', len(made) - len(found))
+        return {made[key]: pickle.loads(value) for key, value in found.items()}
+
+    def _write(self, connection, items, timeout):
+        expires = self._expires(timeout)
+        rows = [
+            (key, pickle.dumps(value, self.pickle_protocol), expires)
+            for key, value in items
+        ]
+        connection.executemany(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires) '
+            'VALUES (?, ?, ?)', rows
+        )
+        self._log(connection, [key for key, _, _ in rows])
+        for key, pickled, expires in rows:
+            self._store.put(key, pickled, expires)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._write(connection, [(key, value)], timeout)
+        self._maybe_cull(connection)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        items = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            items.append((key, value))
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._write(connection, items, timeout)
+        self._maybe_cull(connection)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT expires FROM cache_entry WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and (row[0] is None or row[0] > time.time()):
+                return False
+            self._write(connection, [(key, value)], timeout)
+        self._maybe_cull(connection)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            touched = connection.execute(
+                'UPDATE cache_entry SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (self._expires(timeout), key, time.time())
+            ).rowcount
+            if touched:
+                self._log(connection, [key])
+        self._store.discard(key)
+        self._maybe_cull(connection)
+        return bool(touched)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT value, expires FROM cache_entry WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                raise ValueError(f"Key '{key}' not found")
+            new_value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(new_value, self.pickle_protocol)
+            connection.execute(
+                'UPDATE cache_entry SET value = ? WHERE key = ?',
+                (pickled, key)
+            )
+            self._log(connection, [key])
+        self._store.put(key, pickled, row[1])
+        self._maybe_cull(connection)
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._sync()
+        if self._store.get(key) is not None:
+            return True
+        return key in self._fetch(self._connection(), [key])
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        made = [self.make_key(key, version=version) for key in keys]
+        if not made:
+            return
+        for key in made:
+            self.validate_key(key)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'DELETE FROM cache_entry WHERE key = ?',
+                [(key,) for key in made]
+            )
+            self._log(connection, made)
+        for key in made:
+            self._store.discard(key)
+        self._maybe_cull(connection)
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM cache_entry')
+            self._log(connection, [CLEAR_ALL])
+        self._store.clear()
+
+    def _maybe_cull(self, connection):
+        """Удаляет просроченные записи и старый журнал инвалидаций.
+
+        Считаются записи этого процесса: номера в общем журнале
+        пропускаются записями других процессов и пакетными записями.
+        """
+        store = self._store
+        now = time.time()
+        with store.lock:
+            store.writes += 1
+            if (store.writes < CULL_EVERY
+                    and now - store.culled_at < CULL_SECONDS):
+                return
+            store.writes = 0
+            store.culled_at = now
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(
+                'DELETE FROM cache_entry WHERE expires <= ?', (now,)
+            )
+            connection.execute(
+                'DELETE FROM cache_invalidation WHERE created < ?',
+                (now - INVALIDATION_LOG_TTL,)
+            )
+            total = connection.execute(
+                'SELECT COUNT(*) FROM cache_entry'
+            ).fetchone()[0]
+            if total > self._max_entries:
+                connection.execute(
+                    'DELETE FROM cache_entry WHERE key IN ('
+                    ' SELECT key FROM cache_entry'
+                    ' ORDER BY expires IS NULL, expires LIMIT ?)',
+                    (total // self._cull_frequency,)
+                )
+
+    def close(self, **kwargs):
+        # Соединение переиспользуется между запросами своего потока.
+        pass
@@ -0,0 +1,87 @@
+"""Проверка, что в боевом процессе нет отладочных накладных расходов.
+
+Зарегистрирована в системе checks Django (``manage.py check
+--deploy``), а с STARTUP_SELF_CHECK вызывается и при старте
+приложения: с ошибками процесс не запускается. Там же проверяются
+настройки, с которыми упал бы сам запрос, например формат картинок.
+"""
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+
+DEBUG_APPS = ('debug_toolbar',)
+DEBUG_MIDDLEWARE = ('debug_toolbar.middleware.DebugToolbarMiddleware',)
+DEBUG_CONTEXT_PROCESSOR = 'django.template.context_processors.debug'
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+
+
+def _uses_cached_loader(options):
+    loaders = options.get('loaders')
+    if loaders is None:
+        # Без явного списка Django сам кеширует шаблоны при DEBUG=False.
+        return not settings.DEBUG
+    return all(
+        isinstance(loader, (tuple, list)) and loader[0] == CACHED_LOADER
+        for loader in loaders
+    )
+
+
+def _template_errors():
+    errors = []
+    for template in settings.TEMPLATES:
+        options = template.get('OPTIONS', {})
+        if not _uses_cached_loader(options):
+            errors.append(checks.Error(
+                'Шаблоны загружаются без cached.Loader',
+                hint='Оберните загрузчики в cached.Loader.',
+                id='core.E004',
+            ))
+        if DEBUG_CONTEXT_PROCESSOR in options.get('context_processors', ()):
+            errors.append(checks.Error(
+                f'Включён контекстный процессор {DEBUG_CONTEXT_PROCESSOR}',
+                id='core.E005',
+            ))
+    return errors
+
+
+@checks.register(checks.Tags.security, deploy=True)
+def check_debug_overhead(app_configs=None, **kwargs):
+    errors = []
+    if settings.DEBUG:
+        errors.append(checks.Error('DEBUG включён', id='core.E001'))
+    for app in DEBUG_APPS:
+        if app in settings.INSTALLED_APPS:
+            errors.append(checks.Error(
+                f'Установлено отладочное приложение {app}', id='core.E002',
+            ))
+    for middleware in DEBUG_MIDDLEWARE:
+        if middleware in settings.MIDDLEWARE:
+            errors.append(checks.Error(
+                f'Подключён отладочный middleware {middleware}',
+                id='core.E003',
+            ))
+    return errors + _template_errors()
+
+
+@checks.register()
+def check_post_image_format(app_configs=None, **kwargs):
+    from posts.images import POST_IMAGE_FORMATS
+
+    image_format = getattr(settings, 'POST_IMAGE_FORMAT', None)
+    if image_format in POST_IMAGE_FORMATS:
+        return []
+    return [checks.Error(
+        f'Неизвестный POST_IMAGE_FORMAT {image_format!r}',
+        hint=f'Допустимы: {", ".join(POST_IMAGE_FORMATS)}.',
+        id='core.E006',
+    )]
+
+
+def startup_self_check():
+    """Отказывается запускать процесс с отладочными настройками."""
+    errors = check_debug_overhead()
+    if errors:
+        raise ImproperlyConfigured(
+            'Боевой профиль с отладочными настройками:\n'
+            + '\n'.join(f'{error.id}: {error.msg}' for error in errors)
+        )
@@ -0,0 +1,85 @@
+"""Маршрутизация чтения на реплики с прилипанием к основной базе.
+
+Состояние запроса хранится в contextvar и заполняется
+core.middleware.ReplicaRoutingMiddleware. Чтение уходит на реплику
+только во view из DATABASE_REPLICA_VIEWS, если в этом запросе ещё
+не было записи и пользователь недавно ничего не писал: иначе он мог бы
+не увидеть собственный пост из-за отставания реплики.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RoutingState:
+    def __init__(self, sticky=False):
+        self.sticky = sticky
+        self.read_only = False
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+def start_request(sticky=False):
+    return _state.set(RoutingState(sticky))
+
+
+def finish_request(token):
+    """Сбрасывает состояние и сообщает, была ли в запросе запись."""
+    state = _state.get()
+    _state.reset(token)
+    return state is not None and state.wrote
+
+
+def use_replica():
+    state = _state.get()
+    if state is not None:
+        state.read_only = True
+
+
+def use_primary():
+    """Остаток запроса читает из основной базы."""
+    state = _state.get()
+    if state is not None:
+        state.read_only = False
+
+
+def separate_replicas():
+    """Реплики, которые указывают не на ту же базу, что и default.
+
+    В тестах реплика - зеркало default: для SQLite в памяти это другое
+    соединение, которое не видит данных незавершённой транзакции теста.
+    """
+    primary = connections.databases[DEFAULT_DB_ALIAS]['NAME']
+    return [
+        alias for alias in settings.DATABASE_REPLICAS
+        if connections.databases[alias]['NAME'] != primary
+    ]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.read_only:
+            return None
+        replicas = separate_replicas()
+        if replicas and not state.sticky and not state.wrote:
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Объект, прочитанный с реплики, всё равно пишется в default.
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,73 @@
+"""Бэкенд SQLite для боевого режима.
+
+Каждое новое соединение включает WAL и настраивает прагмы так, чтобы
+читатели не блокировались писателями, а писатель ждал освобождения
+базы вместо ошибки ``database is locked``. Транзакции начинаются
+с BEGIN IMMEDIATE: блокировка на запись берётся сразу, и транзакция
+не падает при попытке поднять блокировку чтения до записи.
+
+Пример настройки::
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.db.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': 600,
+            'OPTIONS': {'pragmas': {'mmap_size': 0}},
+        }
+    }
+"""
+from django.db.backends.sqlite3 import base
+from django.db.backends.sqlite3.base import Database
+
+
+# Порядок важен: auto_vacuum действует только на пустую базу,
+# поэтому задаётся до того, как WAL создаст файл журнала.
+DEFAULT_PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def apply_pragmas(conn, pragmas):
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **kwargs.pop('pragmas', {})}
+        self.transaction_mode = kwargs.pop(
+            'transaction_mode', 'IMMEDIATE'
+        ).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(
+                f'Неизвестный transaction_mode: {self.transaction_mode}'
+            )
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
+
+    def _close(self):
+        # SQLite советует запускать optimize перед закрытием соединения:
+        # он пересобирает статистику только там, где она устарела.
+        if self.connection is not None:
+            try:
+                self.connection.execute('PRAGMA optimize')
+            except Database.Error:
+                pass
+        super()._close()
@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+
+
+# Режимы сравнения: прагмы соединения и начало транзакции записи.
+# stock - то, что даёт стандартный бэкенд Django: журнал отката,
+# synchronous=FULL, тайм-аут модуля sqlite3 и отложенный BEGIN.
+MODES = {
+    'stock': ({'foreign_keys': 'ON'}, 'BEGIN'),
+    'tuned': (DEFAULT_PRAGMAS, 'BEGIN IMMEDIATE'),
+}
+
+SCHEMA = (
+    'CREATE TABLE post ('
+    ' id INTEGER PRIMARY KEY, author_id INTEGER NOT NULL,'
+    ' text TEXT NOT NULL, pub_date REAL NOT NULL)',
+    'CREATE INDEX post_pub_date ON post(pub_date)',
+)
+# Запросы в духе главной страницы и add_comment.
+READ_SQL = (
+    'SELECT id, author_id, text FROM post ORDER BY pub_date DESC LIMIT 10'
+)
+WRITE_SQL = 'INSERT INTO post (author_id, text, pub_date) VALUES (?, ?, ?)'
+
+
+def connect(path, mode):
+    pragmas, _ = MODES[mode]
+    conn = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(conn, pragmas)
+    return conn
+
+
+def prepare(path, mode, rows):
+    conn = connect(path, mode)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.execute('BEGIN')
+    conn.executemany(WRITE_SQL, (
+        (number % 100, 'x' * 200, time.time()) for number in range(rows)
+    ))
+    conn.execute('COMMIT')
+    conn.close()
+
+
+def worker(path, mode, role, start, deadline, results):
+    conn = connect(path, mode)
+    _, begin = MODES[mode]
+    latencies, errors = [], 0
+    # Процессы стартуют по-разному, а мерить нужно одновременно.
+    time.sleep(max(start - time.time(), 0))
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            if role == 'read':
+                conn.execute(READ_SQL).fetchall()
+            else:
+                conn.execute(begin)
+                conn.execute(WRITE_SQL, (1, 'y' * 200, time.time()))
+                conn.execute('COMMIT')
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    results.put((role, latencies, errors))
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает конкурентные чтение и запись в SQLite со стандартными '
+        'настройками Django и с прагмами core.db.sqlite3'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--rows', type=int, default=10000,
+            help='Сколько строк положить в таблицу перед замером',
+        )
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('spawn')
+        self.stdout.write(
+            f"{'режим':<6} {'роль':<5} {'оп/с':>8} {'p50 мс':>8} "
+            f"{'p99 мс':>8} {'ошибок':>7}"
+        )
+        for mode in MODES:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                prepare(path, mode, options['rows'])
+                results = context.Queue()
+                start = time.time() + 2
+                deadline = start + options['seconds']
+                roles = (
+                    ['read'] * options['readers']
+                    + ['write'] * options['writers']
+                )
+                processes = [
+                    context.Process(
+                        target=worker,
+                        args=(path, mode, role, start, deadline, results),
+                    )
+                    for role in roles
+                ]
+                for process in processes:
+                    process.start()
+                collected = [results.get() for _ in processes]
+                for process in processes:
+                    process.join()
+            self.report(mode, collected, options['seconds'])
+
+    def report(self, mode, collected, seconds):
+        for role in ('read', 'write'):
+            latencies, errors = [], 0
+            for result_role, result_latencies, result_errors in collected:
+                if result_role == role:
+                    latencies += result_latencies
+                    errors += result_errors
+            self.stdout.write(
+                f'{mode:<6} {role:<5} {len(latencies) / seconds:>8.0f} '
+                f'{statistics.median(latencies or [0]) * 1000:>8.2f} '
+                f'{percentile(latencies, 0.99) * 1000:>8.2f} {errors:>7}'
+            )
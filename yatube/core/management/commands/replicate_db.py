@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файл реплики через backup API. '
+        'Заменяет репликацию при локальной проверке DATABASE_REPLICAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default='default')
+        parser.add_argument('--target', default='replica')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять копирование каждые N секунд; 0 - один раз. '
+                 'Интервал задаёт отставание реплики',
+        )
+
+    def handle(self, *args, **options):
+        for alias in (options['source'], options['target']):
+            if alias not in connections.databases:
+                raise CommandError(f'База {alias!r} не настроена')
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError('Команда работает только с SQLite')
+        source_name = connections.databases[options['source']]['NAME']
+        target_name = connections.databases[options['target']]['NAME']
+        while True:
+            started = time.monotonic()
+            source = sqlite3.connect(source_name)
+            target = sqlite3.connect(target_name)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(
+                f'Реплика обновлена за {time.monotonic() - started:.3f} с'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
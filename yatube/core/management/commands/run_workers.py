@@ -0,0 +1,101 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import tasks
+from core.models import Task
+
+
+# Как часто проверять, живы ли процессы пула.
+SUPERVISE_SECONDS = 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди core.tasks пулом процессов. '
+        'Процесс, упавший вместе с задачей, перезапускается, а задачу '
+        'после срока аренды забирает другой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.TASKS_WORKERS,
+            help='Число процессов; 0 - выполнять в текущем процессе',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Сколько секунд ждать, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи в текущем процессе и выйти',
+        )
+        parser.add_argument(
+            '--status', action='store_true',
+            help='Показать число задач в очереди по статусам и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self.report_status()
+            return
+        if options['once'] or not options['processes']:
+            done = tasks.work(
+                once=options['once'], poll_interval=options['poll_interval']
+            )
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        self.supervise(options['processes'], options['poll_interval'])
+
+    def supervise(self, number, poll_interval):
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        stopping = []
+        # Обработчик только запоминает сигнал: stop.set() прямо в нём
+        # может зависнуть на блокировке, которую держит прерванный код.
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopping.append(True))
+        processes = [None] * number
+        self.stdout.write(f'Процессов очереди: {number}')
+        try:
+            while not stopping:
+                for index, process in enumerate(processes):
+                    if process is not None and process.is_alive():
+                        continue
+                    if process is not None:
+                        self.stderr.write(
+                            f'Процесс {process.pid} завершился с кодом '
+                            f'{process.exitcode}, перезапуск'
+                        )
+                    processes[index] = context.Process(
+                        target=tasks.worker_process,
+                        args=(stop, poll_interval),
+                    )
+                    processes[index].start()
+                time.sleep(SUPERVISE_SECONDS)
+        finally:
+            stop.set()
+            for process in processes:
+                if process is None:
+                    continue
+                process.join(timeout=tasks.TASKS_LEASE_SECONDS)
+                if process.is_alive():
+                    process.terminate()
+        self.stdout.write('Процессы очереди остановлены')
+
+    def report_status(self):
+        stats = tasks.queue_stats()
+        if not stats:
+            self.stdout.write('Очередь пуста')
+            return
+        statuses = (Task.PENDING, Task.RUNNING, Task.FAILED)
+        self.stdout.write(f"{'задача':<45} " + ' '.join(
+            f'{status:>8}' for status in statuses
+        ))
+        for name, counts in sorted(stats.items()):
+            self.stdout.write(f'{name:<45} ' + ' '.join(
+                f'{counts.get(status, 0):>8}' for status in statuses
+            ))
@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import timing
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает замеры запросов по view за скользящее окно, '
+        'собранные ServerTimingMiddleware во всех процессах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', default='total_p95',
+            help='Поле сводки для сортировки, по убыванию',
+        )
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        summary = timing.summary(timing.collected_stats())
+        if options['json']:
+            self.stdout.write(json.dumps(summary, ensure_ascii=False))
+            return
+        if not summary:
+            self.stdout.write('Замеров пока нет')
+            return
+        self.stdout.write(
+            f"{'view':<28} {'запросов':>8} {'p50 мс':>8} {'p95 мс':>8} "
+            f"{'p99 мс':>8} {'БД p95':>8} {'SQL p95':>7} "
+            f"{'рендер p95':>10} {'кеш':>5} {'429':>6} {'очередь p95':>11}"
+        )
+        rows = sorted(
+            summary.items(),
+            key=lambda item: item[1].get(options['sort']) or 0,
+            reverse=True,
+        )
+        for view, row in rows:
+            ratio = row['cache_hit_ratio']
+            self.stdout.write(
+                f"{view:<28} {row['requests']:>8} {row['total_p50']:>8.1f} "
+                f"{row['total_p95']:>8.1f} {row['total_p99']:>8.1f} "
+                f"{row['db_p95']:>8.1f} {row['queries_p95']:>7.0f} "
+                f"{row['render_p95']:>10.1f} "
+                f"{'-' if ratio is None else f'{ratio:.0%}':>5} "
+                f"{row['throttled']:>6} {row['queue_p95']:>11.1f}"
+            )
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Обслуживание базы SQLite: ANALYZE, PRAGMA optimize, '
+        'incremental vacuum и checkpoint WAL. Запускать по расписанию, '
+        'например из cron раз в час'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='Алиас базы из settings.DATABASES',
+        )
+        parser.add_argument(
+            '--vacuum-pages', type=int, default=1000,
+            help='Сколько свободных страниц возвращать за один запуск',
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Полный ANALYZE вместо PRAGMA optimize',
+        )
+        parser.add_argument(
+            '--enable-auto-vacuum', action='store_true',
+            help='Перевести существующую базу в auto_vacuum=INCREMENTAL '
+                 '(выполняет полный VACUUM)',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite')
+        with connection.cursor() as cursor:
+            if options['enable_auto_vacuum']:
+                cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                cursor.execute('VACUUM')
+                self.stdout.write('auto_vacuum включён')
+            if options['analyze']:
+                cursor.execute('ANALYZE')
+                self.stdout.write('ANALYZE выполнен')
+            cursor.execute('PRAGMA optimize')
+            cursor.execute('PRAGMA freelist_count')
+            free_pages = cursor.fetchone()[0]
+            cursor.execute(
+                f"PRAGMA incremental_vacuum({options['vacuum_pages']})"
+            )
+            # Прагма освобождает по странице на шаг: дочитываем до конца.
+            cursor.fetchall()
+            cursor.execute('PRAGMA freelist_count')
+            freed = free_pages - cursor.fetchone()[0]
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, освобождено страниц: {freed}'
+        ))
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+
+from core import timing
+from core.db import routers
+
+
+class ReplicaRoutingMiddleware:
+    """Отправляет чтение во view только для чтения на реплики.
+
+    После запроса с записью ставит cookie, и следующие
+    DATABASE_STICKY_SECONDS секунд пользователь читает из основной базы.
+    """
+    cookie_name = 'db_primary_until'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            sticky_until = float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            sticky_until = 0
+        token = routers.start_request(sticky=sticky_until > time.time())
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request(token)
+        if wrote:
+            window = settings.DATABASE_STICKY_SECONDS
+            response.set_cookie(
+                self.cookie_name, str(time.time() + window),
+                max_age=window, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name
+            in settings.DATABASE_REPLICA_VIEWS
+        ):
+            routers.use_replica()
+
+
+class ServerTimingMiddleware:
+    """Замеряет запрос и отдаёт итоги в заголовке Server-Timing.
+
+    Стоит первым в MIDDLEWARE, чтобы в total вошли и остальные
+    middleware. Итоги записываются в скользящие гистограммы по имени
+    view, их показывают страница stats/timing/ и команда server_timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        timings, token = timing.start_request()
+        try:
+            with timing.track_queries(timings):
+                response = self.get_response(request)
+        finally:
+            timing.finish_request(token)
+        total = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        timing.stats.record(
+            match.view_name if match else 'unresolved', timings, total
+        )
+        timing.stats.maybe_publish()
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timing.server_timing_header(
+                timings, total
+            )
+        return response
@@ -1,4 +1,7 @@
+from contextlib import contextmanager
+
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -9,3 +12,81 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class UpdatedModel(CreatedModel):
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
+
+    class Meta:
+        abstract = True
+
+
+@contextmanager
+def keep_pub_dates(*models):
+    """Отключает auto_now_add у pub_date, чтобы bulk_create сохранил даты.
+
+    Нужен при загрузке готовых данных, где дата публикации уже известна.
+    """
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Task(models.Model):
+    """Отложенная задача очереди core.tasks.
+
+    Выполненные задачи удаляются, исчерпавшие попытки остаются
+    со статусом failed и текстом последней ошибки.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ждёт'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы JSON')
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=200, blank=True, null=True,
+    )
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING,
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Предел попыток', default=5)
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    # Срок, после которого задачу упавшего процесса забирает другой.
+    locked_until = models.DateTimeField(
+        'Занята до', blank=True, null=True,
+    )
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+        constraints = [
+            # Одинаковая ждущая задача ставится один раз.
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_task',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
@@ -0,0 +1,271 @@
+"""Локальная очередь фоновых задач в основной базе.
+
+Задача - функция, помеченная декоратором task; в очередь она ставится
+вызовом ``function.enqueue(*args, **kwargs)``, аргументы должны
+сериализоваться в JSON. Запись в таблицу core_task идёт в той же
+транзакции, что и остальные записи запроса, поэтому задача
+не потеряется и не выполнится раньше коммита.
+
+Задачи выполняет команда run_workers. Процесс забирает задачу
+условным UPDATE (другой процесс просто не найдёт её в статусе
+pending) и держит её до locked_until; задача упавшего процесса
+после этого срока достаётся следующему, а исчерпавшая попытки
+помечается failed. Исход попытки записывается, только пока задача
+держится этим процессом. Ошибка откладывает повтор
+с экспоненциальной задержкой, после max_attempts попыток задача
+остаётся в статусе failed. Ждущая задача с тем же dedup_key второй
+раз не ставится.
+
+Время в очереди, длительность и ошибки каждой задачи пишутся
+в скользящие гистограммы core.timing под именем ``task:<имя>``.
+
+Модели импортируются внутри функций: модули с задачами импортируются
+и в процессах до django.setup().
+"""
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core import timing
+
+
+logger = logging.getLogger(__name__)
+
+TASKS_MAX_ATTEMPTS = getattr(settings, 'TASKS_MAX_ATTEMPTS', 5)
+TASKS_LEASE_SECONDS = getattr(settings, 'TASKS_LEASE_SECONDS', 300)
+TASKS_BACKOFF_SECONDS = getattr(settings, 'TASKS_BACKOFF_SECONDS', 10)
+TASKS_BACKOFF_MAX_SECONDS = getattr(
+    settings, 'TASKS_BACKOFF_MAX_SECONDS', 60 * 60
+)
+# Сколько кандидатов перебирать, если соседние процессы их перехватили.
+CLAIM_CANDIDATES = 5
+
+
+def task(max_attempts=TASKS_MAX_ATTEMPTS):
+    """Делает функцию задачей очереди с методом enqueue.
+
+    Имя задачи - путь к функции, по нему процесс очереди её находит.
+    Сама функция по-прежнему вызывается напрямую.
+    """
+    def decorator(function):
+        name = f'{function.__module__}.{function.__qualname__}'
+
+        def enqueue_task(*args, dedup_key=None, delay=0, **kwargs):
+            return enqueue(
+                name, args, kwargs, dedup_key=dedup_key, delay=delay,
+                max_attempts=max_attempts,
+            )
+
+        function.task_name = name
+        function.enqueue = enqueue_task
+        return function
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, dedup_key=None, delay=0,
+            max_attempts=TASKS_MAX_ATTEMPTS):
+    """Ставит задачу в очередь; False, если такая уже ждёт."""
+    from core.models import Task
+
+    if dedup_key is not None and Task.objects.filter(
+        dedup_key=dedup_key, status=Task.PENDING
+    ).exists():
+        return False
+    # Гонку двух одинаковых постановок решает частичный уникальный
+    # индекс: вторая вставка падает, и задача не ставится.
+    try:
+        with transaction.atomic():
+            Task.objects.create(
+                name=name,
+                payload=json.dumps(
+                    {'args': list(args), 'kwargs': kwargs or {}}
+                ),
+                dedup_key=dedup_key,
+                max_attempts=max_attempts,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def _due(now):
+    from core.models import Task
+
+    return (
+        Q(status=Task.PENDING, run_at__lte=now)
+        | Q(
+            status=Task.RUNNING, locked_until__lt=now,
+            attempts__lt=F('max_attempts'),
+        )
+    )
+
+
+def fail_abandoned(now):
+    """Помечает failed задачи, чей процесс погиб на последней попытке.
+
+    Такая задача не доходит до учёта ошибки в run() (процесс убит
+    по памяти или сигналом), поэтому без этого забиралась бы вечно.
+    """
+    from core.models import Task
+
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Task.FAILED, locked_until=None,
+        last_error='Процесс очереди не завершил задачу за срок блокировки',
+    )
+
+
+def claim():
+    """Забирает очередную задачу или возвращает None."""
+    from core.models import Task
+
+    now = timezone.now()
+    fail_abandoned(now)
+    candidates = Task.objects.filter(_due(now)).order_by(
+        'run_at'
+    ).values_list('pk', flat=True)[:CLAIM_CANDIDATES]
+    for pk in list(candidates):
+        claimed = Task.objects.filter(_due(now), pk=pk).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=TASKS_LEASE_SECONDS),
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def backoff(attempts):
+    """Задержка перед повтором: удваивается с попыткой, со случайным
+    разбросом, чтобы повторы разных задач не совпадали."""
+    delay = min(
+        TASKS_BACKOFF_SECONDS * 2 ** (attempts - 1), TASKS_BACKOFF_MAX_SECONDS
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+def resolve(name):
+    """Функция задачи по имени; только помеченные декоратором task."""
+    function = import_string(name)
+    if getattr(function, 'task_name', None) != name:
+        raise ImportError(f'{name} не задача очереди')
+    return function
+
+
+def run(job):
+    """Выполняет забранную задачу и записывает её исход."""
+    from core.models import Task
+
+    waited = (timezone.now() - job.run_at).total_seconds() * 1000
+    started = time.perf_counter()
+    timings, token = timing.start_request()
+    timings.add('queue', max(waited, 0))
+    error = None
+    try:
+        with timing.track_queries(timings):
+            payload = json.loads(job.payload)
+            resolve(job.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        timings.count('failed')
+    finally:
+        timing.finish_request(token)
+    timing.stats.record(
+        f'task:{job.name}', timings, (time.perf_counter() - started) * 1000
+    )
+    timing.stats.maybe_publish()
+    # Срок блокировки отличает эту попытку от следующей: если он истёк
+    # и задачу забрал другой процесс, её строку мы уже не трогаем.
+    queued = Task.objects.filter(
+        pk=job.pk, status=Task.RUNNING, locked_until=job.locked_until
+    )
+    if error is None:
+        queued.delete()
+        return True
+    logger.error('Задача %s упала:\n%s', job.name, error)
+    if job.attempts >= job.max_attempts:
+        queued.update(status=Task.FAILED, last_error=error)
+        return False
+    retry_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+    try:
+        with transaction.atomic():
+            queued.update(
+                status=Task.PENDING, run_at=retry_at, locked_until=None,
+                last_error=error,
+            )
+    except IntegrityError:
+        # В очереди уже ждёт такая же задача, она и сделает работу.
+        queued.delete()
+    return False
+
+
+def work(stop=None, once=False, poll_interval=1.0):
+    """Цикл процесса очереди. Возвращает число выполненных задач.
+
+    once - выполнить всё, что готово сейчас, и выйти;
+    stop - multiprocessing.Event для остановки между задачами.
+    """
+    done = 0
+    while stop is None or not stop.is_set():
+        if not once:
+            # Процесс живёт долго: как после запроса, закрываем
+            # сломанные и устаревшие соединения.
+            close_old_connections()
+        job = claim()
+        if job is None:
+            if once:
+                break
+            if stop is not None:
+                stop.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        run(job)
+        done += 1
+    return done
+
+
+def worker_process(stop, poll_interval):
+    """Процесс пула run_workers, запускается через multiprocessing spawn."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+    # Ctrl+C и SIGTERM от systemd получает вся группа процессов, а
+    # останавливает их run_workers через stop: процесс, убитый внутри
+    # stop.wait(), оставил бы блокировку stop занятой навсегда.
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.SIG_IGN)
+    logger.info('Процесс очереди %s:%s запущен',
+                socket.gethostname(), os.getpid())
+    work(stop=stop, poll_interval=poll_interval)
+    timing.stats.publish()
+
+
+def queue_stats():
+    """Число задач по имени и статусу: {name: {status: n}}."""
+    from django.db.models import Count
+
+    from core.models import Task
+
+    result = {}
+    rows = Task.objects.order_by().values('name', 'status').annotate(
+        number=Count('id')
+    )
+    for row in rows:
+        result.setdefault(row['name'], {})[row['status']] = row['number']
+    return result
@@ -0,0 +1,25 @@
+from django.template.backends.django import DjangoTemplates, Template
+
+from core import timing
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timing.span('render'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонный бэкенд Django, который замеряет время рендера.
+
+    Замеряется только рендер шаблона целиком: include и наследование
+    идут внутри движка и попадают в то же время.
+    """
+
+    def from_string(self, template_code):
+        template = super().from_string(template_code)
+        return TimedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
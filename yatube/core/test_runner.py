@@ -0,0 +1,33 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def temporary_caches(directory):
+    """CACHES проекта с файлами двухуровневого кеша в directory."""
+    return {
+        alias: {**cache, 'LOCATION': f'{directory}/{alias}.sqlite3'}
+        if cache['BACKEND'] == 'core.cache.TwoTierCache' else cache
+        for alias, cache in settings.CACHES.items()
+    }
+
+
+class TemporaryCacheRunner(DiscoverRunner):
+    """Тесты пишут кеш во временный каталог, а не в файл проекта:
+    cache.clear() в тестах не трогает кеш запущенного dev-сервера."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp()
+        self.caches = override_settings(
+            CACHES=temporary_caches(self.cache_dir)
+        )
+        self.caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,120 @@
+import multiprocessing
+import shutil
+import sqlite3
+import tempfile
+import os
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.views.decorators.cache import cache_page
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+
+CACHE_DIR = tempfile.mkdtemp()
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'L1_MAX_BYTES': 4096},
+    }
+}
+
+
+def write_from_another_process(key, value):
+    caches['default'].set(key, value)
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def test_low_level_api(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 'value'))
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'missing']), {'a': 1, 'b': 2}
+        )
+        self.assertEqual(self.cache.incr('a', 10), 11)
+        self.cache.delete_many(['a', 'b'])
+        self.assertIsNone(self.cache.get('a'))
+        self.assertTrue(self.cache.has_key('new'))
+        self.cache.set('expired', 'value', 0)
+        self.assertIsNone(self.cache.get('expired'))
+
+    @mock.patch('core.cache.CULL_EVERY', 3)
+    def test_any_writes_cull_expired_entries(self):
+        self.cache._store.writes = 0
+        self.cache.set('expired', 'value', 0)
+        self.cache.add('counter', 1)
+        connection = self.cache._connection()
+        count = 'SELECT COUNT(*) FROM cache_entry WHERE key LIKE ?'
+        self.assertEqual(
+            connection.execute(count, ('%expired',)).fetchone()[0], 1
+        )
+        self.cache.incr('counter')
+        self.assertEqual(
+            connection.execute(count, ('%expired',)).fetchone()[0], 0
+        )
+
+    def test_l1_is_bounded_by_bytes(self):
+        for i in range(50):
+            self.cache.set(f'key{i}', 'x' * 500)
+        store = self.cache._store
+        self.assertLessEqual(store.size, 4096)
+        self.assertEqual(self.cache.get('key0'), 'x' * 500)
+
+    def test_writes_from_other_process_invalidate_l1(self):
+        self.cache.set('shared', 'old')
+        self.assertEqual(self.cache.get('shared'), 'old')
+        context = multiprocessing.get_context('fork')
+        process = context.Process(
+            target=write_from_another_process, args=('shared', 'new')
+        )
+        process.start()
+        process.join()
+        self.assertEqual(self.cache.get('shared'), 'new')
+
+    def test_l1_is_cleared_when_whole_log_was_culled(self):
+        """Процесс, проспавший запись и обрезку всего журнала, не отдаёт
+        старое значение из L1."""
+        self.cache.set('shared', 'old')
+        self.assertEqual(self.cache.get('shared'), 'old')
+        context = multiprocessing.get_context('fork')
+        process = context.Process(
+            target=write_from_another_process, args=('shared', 'new')
+        )
+        process.start()
+        process.join()
+        other = sqlite3.connect(TWO_TIER_CACHES['default']['LOCATION'])
+        with other:
+            other.execute('DELETE FROM cache_invalidation')
+        other.close()
+        self.assertEqual(self.cache.get('shared'), 'new')
+
+    # Панель кеша debug_toolbar после первого запроса подменяет caches
+    # в django.middleware.cache и не видит override_settings(CACHES).
+    @mock.patch('django.middleware.cache.caches', caches)
+    def test_works_with_cache_page(self):
+        calls = []
+
+        @cache_page(60)
+        def view(request):
+            calls.append(request)
+            return HttpResponse('ok')
+
+        request = RequestFactory().get('/cached/')
+        view(request)
+        view(request)
+        self.assertEqual(len(calls), 1)
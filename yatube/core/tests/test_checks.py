@@ -0,0 +1,111 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from core import checks
+
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        'context_processors': [
+            'django.template.context_processors.request',
+        ],
+        'loaders': [
+            (checks.CACHED_LOADER, [
+                'django.template.loaders.filesystem.Loader',
+            ]),
+        ],
+    },
+}]
+
+
+def error_ids():
+    return [error.id for error in checks.check_debug_overhead()]
+
+
+class PostImageFormatCheckTests(SimpleTestCase):
+    def test_known_format_passes(self):
+        self.assertEqual(checks.check_post_image_format(), [])
+
+    @override_settings(POST_IMAGE_FORMAT='TIFF')
+    def test_unknown_format_is_error(self):
+        self.assertEqual(
+            [error.id for error in checks.check_post_image_format()],
+            ['core.E006'],
+        )
+
+
+class DebugOverheadCheckTests(SimpleTestCase):
+    @override_settings(
+        DEBUG=False,
+        TEMPLATES=CACHED_TEMPLATES,
+        INSTALLED_APPS=[
+            app for app in settings.INSTALLED_APPS
+            if app not in checks.DEBUG_APPS
+        ],
+        MIDDLEWARE=[
+            middleware for middleware in settings.MIDDLEWARE
+            if middleware not in checks.DEBUG_MIDDLEWARE
+        ],
+    )
+    def test_lean_settings_pass(self):
+        self.assertEqual(error_ids(), [])
+        checks.startup_self_check()
+
+    @override_settings(DEBUG=True)
+    def test_development_settings_are_refused(self):
+        ids = error_ids()
+        for expected in ('core.E001', 'core.E002', 'core.E003', 'core.E004',
+                         'core.E005'):
+            self.assertIn(expected, ids)
+        with self.assertRaisesMessage(ImproperlyConfigured, 'core.E001'):
+            checks.startup_self_check()
+
+
+class SettingsProfileTests(SimpleTestCase):
+    def load(self, **env):
+        """Профиль, DEBUG и debug_toolbar в новом процессе с окружением."""
+        code = (
+            'from django.conf import settings; '
+            'print(settings.SETTINGS_PROFILE, settings.DEBUG, '
+            "'debug_toolbar' in settings.INSTALLED_APPS)"
+        )
+        environ = {
+            name: value for name, value in os.environ.items()
+            if not name.startswith('YATUBE_')
+        }
+        environ.update(DJANGO_SETTINGS_MODULE='yatube.settings', **env)
+        return subprocess.run(
+            [sys.executable, '-c', code], env=environ,
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+
+    def test_development_is_default(self):
+        result = self.load()
+        self.assertEqual(
+            result.stdout.split(), ['development', 'True', 'True']
+        )
+
+    def test_production_profile(self):
+        result = self.load(
+            YATUBE_SETTINGS_PROFILE='production', YATUBE_SECRET_KEY='key'
+        )
+        self.assertEqual(
+            result.stdout.split(), ['production', 'False', 'False']
+        )
+
+    def test_production_requires_secret_key(self):
+        result = self.load(YATUBE_SETTINGS_PROFILE='production')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('YATUBE_SECRET_KEY', result.stderr)
+
+    def test_unknown_profile_is_refused(self):
+        result = self.load(YATUBE_SETTINGS_PROFILE='staging')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('staging', result.stderr)
@@ -0,0 +1,51 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from core.db.sqlite3.base import DatabaseWrapper
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            'NAME': os.path.join(directory.name, 'db.sqlite3'),
+            'OPTIONS': {'pragmas': {'busy_timeout': 1234}},
+        }, alias='scratch')
+        self.addCleanup(self.wrapper.close)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_pragmas(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+        self.assertEqual(self.pragma('auto_vacuum'), 2)
+        self.assertEqual(self.pragma('foreign_keys'), 1)
+
+    def test_atomic_takes_write_lock_immediately(self):
+        self.wrapper.ensure_connection()
+        executed = []
+        self.wrapper.connection.set_trace_callback(executed.append)
+        self.wrapper.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True
+        )
+        self.assertIn('BEGIN IMMEDIATE', executed)
+        self.wrapper.rollback()
+
+
+class SQLiteMaintenanceTests(TransactionTestCase):
+    def test_maintenance_command(self):
+        out = StringIO()
+        call_command('sqlite_maintenance', '--analyze', stdout=out)
+        self.assertIn('ANALYZE', out.getvalue())
+        self.assertIn('Готово', out.getvalue())
@@ -0,0 +1,68 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from core.db import routers
+from core.middleware import ReplicaRoutingMiddleware
+from posts.models import Post
+
+
+User = get_user_model()
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        patcher = mock.patch.object(
+            routers, 'separate_replicas', return_value=['replica']
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_with(self, sticky=False, wrote=False):
+        token = routers.start_request(sticky=sticky)
+        try:
+            routers.use_replica()
+            if wrote:
+                self.router.db_for_write(Post)
+            return self.router.db_for_read(Post)
+        finally:
+            routers.finish_request(token)
+
+    def test_read_only_request_uses_replica(self):
+        self.assertEqual(self.read_with(), 'replica')
+
+    def test_sticky_or_writing_request_uses_primary(self):
+        self.assertIsNone(self.read_with(sticky=True))
+        self.assertIsNone(self.read_with(wrote=True))
+
+    def test_outside_request_uses_primary(self):
+        self.assertIsNone(self.router.db_for_read(Post))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    @mock.patch.object(routers.settings, 'DATABASE_REPLICAS', ['replica'])
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+
+class ReplicaRoutingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.client.force_login(self.user)
+
+    def test_write_makes_reads_sticky(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        cookie = response.cookies[ReplicaRoutingMiddleware.cookie_name]
+        self.assertGreater(float(cookie.value), time.time())
+
+    def test_read_does_not_set_cookie(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(
+            ReplicaRoutingMiddleware.cookie_name, response.cookies
+        )
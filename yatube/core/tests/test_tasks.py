@@ -0,0 +1,178 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks, timing
+from core.models import Task
+
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task(max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@tasks.task()
+def broken():
+    raise ValueError('сломано')
+
+
+def not_a_task():
+    calls.append('не задача')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        patcher = mock.patch.object(timing, 'stats', timing.RollingStats())
+        self.stats = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueued_task_runs_once_and_is_removed(self):
+        self.assertTrue(record.enqueue('a'))
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.work(once=True), 1)
+        self.assertEqual(calls, ['a'])
+        self.assertFalse(Task.objects.exists())
+        stats = self.stats.snapshot()[f'task:{record.task_name}']
+        self.assertEqual(stats.counts['requests'], 1)
+        self.assertEqual(stats.counts['failed'], 0)
+
+    def test_pending_duplicate_is_skipped(self):
+        self.assertTrue(record.enqueue('a', dedup_key='same'))
+        self.assertFalse(record.enqueue('b', dedup_key='same'))
+        self.assertTrue(record.enqueue('c'))
+        tasks.work(once=True)
+        self.assertEqual(calls, ['a', 'c'])
+        # После выполнения такую задачу снова можно поставить.
+        self.assertTrue(record.enqueue('d', dedup_key='same'))
+
+    def test_duplicate_lost_in_race_is_reported(self):
+        """Вторую постановку, которую не заметила проверка, отбрасывает
+        уникальный индекс, и enqueue возвращает False."""
+        self.assertTrue(record.enqueue('a', dedup_key='same'))
+        with mock.patch.object(QuerySet, 'exists', return_value=False):
+            self.assertFalse(record.enqueue('b', dedup_key='same'))
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_delayed_task_waits(self):
+        record.enqueue('later', delay=60)
+        self.assertEqual(tasks.work(once=True), 0)
+        Task.objects.update(run_at=timezone.now())
+        self.assertEqual(tasks.work(once=True), 1)
+
+    def test_failure_is_retried_with_backoff_then_failed(self):
+        broken.enqueue()
+        before = timezone.now()
+        tasks.work(once=True)
+        job = Task.objects.get()
+        self.assertEqual(job.status, Task.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('сломано', job.last_error)
+        self.assertGreaterEqual(
+            job.run_at,
+            before + timedelta(seconds=tasks.TASKS_BACKOFF_SECONDS / 2),
+        )
+        for _ in range(tasks.TASKS_MAX_ATTEMPTS - 1):
+            Task.objects.update(run_at=timezone.now())
+            tasks.work(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(job.attempts, tasks.TASKS_MAX_ATTEMPTS)
+        stats = self.stats.snapshot()[f'task:{broken.task_name}']
+        self.assertEqual(stats.counts['failed'], tasks.TASKS_MAX_ATTEMPTS)
+
+    def test_backoff_grows_and_is_capped(self):
+        with mock.patch('core.tasks.random.uniform', return_value=1):
+            self.assertEqual(tasks.backoff(1), tasks.TASKS_BACKOFF_SECONDS)
+            self.assertEqual(
+                tasks.backoff(3), tasks.TASKS_BACKOFF_SECONDS * 4
+            )
+            self.assertEqual(
+                tasks.backoff(50), tasks.TASKS_BACKOFF_MAX_SECONDS
+            )
+
+    def test_expired_lease_is_claimed_again(self):
+        record.enqueue('a')
+        job = tasks.claim()
+        self.assertIsNone(tasks.claim())
+        Task.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(tasks.claim().pk, job.pk)
+
+    def expire_lease(self, job):
+        Task.objects.filter(pk=job.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_task_killing_its_worker_fails_after_max_attempts(self):
+        """Задача, процесс которой погибает, не забирается вечно."""
+        record.enqueue('a')
+        # У record две попытки.
+        for _ in range(2):
+            job = tasks.claim()
+            self.assertIsNotNone(job)
+            self.expire_lease(job)
+        self.assertIsNone(tasks.claim())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_expired_worker_keeps_hands_off_reclaimed_task(self):
+        """Медленный процесс с истёкшей блокировкой не удаляет задачу,
+        которую уже выполняет другой."""
+        record.enqueue('a')
+        slow = tasks.claim()
+        self.expire_lease(slow)
+        fresh = tasks.claim()
+        self.assertEqual(fresh.pk, slow.pk)
+        self.assertTrue(tasks.run(slow))
+        self.assertEqual(
+            Task.objects.get(pk=fresh.pk).locked_until, fresh.locked_until
+        )
+        self.assertTrue(tasks.run(fresh))
+        self.assertFalse(Task.objects.exists())
+
+    def test_only_marked_functions_run(self):
+        tasks.enqueue(f'{__name__}.not_a_task', max_attempts=1)
+        tasks.work(once=True)
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_run_workers_once_and_status(self):
+        record.enqueue('a')
+        broken.enqueue()
+        out = StringIO()
+        call_command('run_workers', '--status', stdout=out)
+        self.assertIn(record.task_name, out.getvalue())
+        out = StringIO()
+        call_command('run_workers', '--once', stdout=out)
+        self.assertIn('Выполнено задач: 2', out.getvalue())
+        self.assertEqual(calls, ['a'])
+
+    def test_password_reset_email_is_sent_by_task(self):
+        User.objects.create_user(
+            username='user', email='user@example.com', password='pass'
+        )
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'user@example.com'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(mail.outbox), 0)
+        tasks.work(once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['user@example.com'])
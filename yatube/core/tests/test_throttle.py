@@ -0,0 +1,147 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import throttle, timing
+from core.cache import TwoTierCache
+from posts.models import Comment, Follow, Post
+
+
+User = get_user_model()
+
+CLIENT_IP = '203.0.113.7'
+RATES = {
+    'add_comment': {'user': '2/m', 'ip': '3/m'},
+    'follow': {'user': '1/m'},
+}
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(throttle.parse_rate('10/m'), (10, 60))
+        self.assertEqual(throttle.parse_rate('100/hour'), (100, 3600))
+
+    def test_bucket_empties_and_refills(self):
+        # Окна по 60 секунд: 960-1020, 1020-1080.
+        buckets = {'bucket': (2, 60)}
+        self.assertEqual(throttle.take(buckets, now=1000), 0)
+        self.assertEqual(throttle.take(buckets, now=1000), 0)
+        self.assertAlmostEqual(throttle.take(buckets, now=1000), 50)
+        # Предыдущее окно с двумя запросами весит 1 - 0/60.
+        self.assertAlmostEqual(throttle.take(buckets, now=1020), 30)
+        self.assertEqual(throttle.take(buckets, now=1050), 0)
+        self.assertAlmostEqual(throttle.take(buckets, now=1050), 30)
+
+    def test_concurrent_requests_do_not_pass_over_limit(self):
+        """Одновременные запросы одного клиента не получают лишних
+        пропусков: счётчик увеличивается атомарно."""
+        buckets = {'bucket': (5, 60)}
+        barrier = threading.Barrier(20)
+        results = []
+        get_many = TwoTierCache.get_many
+
+        def read_together(cache, keys, version=None):
+            # Все запросы прочитали кеш, прежде чем кто-то записал.
+            found = get_many(cache, keys, version=version)
+            barrier.wait()
+            return found
+
+        def request():
+            results.append(throttle.take(buckets, now=1000))
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        with mock.patch.object(TwoTierCache, 'get_many', read_together):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(0), 5)
+
+    def test_refused_request_takes_no_tokens(self):
+        """Пустое ведро IP не тратит токены из ведра пользователя."""
+        throttle.take({'ip': (1, 60)}, now=1000)
+        buckets = {'user': (1, 60), 'ip': (1, 60)}
+        self.assertTrue(throttle.take(buckets, now=1000))
+        self.assertEqual(throttle.take({'user': (1, 60)}, now=1000), 0)
+
+
+@override_settings(THROTTLE_RATES=RATES, THROTTLE_EXEMPT_IPS=[])
+class ThrottledViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(2)
+        ]
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.clients = []
+        for user in self.users:
+            client = Client(REMOTE_ADDR=CLIENT_IP)
+            client.force_login(user)
+            self.clients.append(client)
+        patcher = mock.patch.object(timing, 'stats', timing.RollingStats())
+        self.stats = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def comment(self, client):
+        return client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+
+    def test_user_limit_returns_429_without_writing(self):
+        first = self.clients[0]
+        # 40-я секунда окна: до следующего 20 секунд и ещё половина
+        # периода, пока вес двух запросов не упадёт до одного.
+        with mock.patch.object(throttle, 'time') as clock:
+            clock.time.return_value = 1000
+            for _ in range(2):
+                self.assertEqual(self.comment(first).status_code, 302)
+            response = self.comment(first)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response['Retry-After']), 50)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(
+            self.stats.snapshot()['posts:add_comment'].counts['throttled'], 1
+        )
+
+    def test_ip_limit_is_shared_by_users(self):
+        first, second = self.clients
+        for client in (first, first, second):
+            self.assertEqual(self.comment(client).status_code, 302)
+        self.assertEqual(self.comment(second).status_code, 429)
+
+    def test_follow_and_unfollow_share_limit(self):
+        client = self.clients[0]
+        response = client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertEqual(response.status_code, 302)
+        response = client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(Follow.objects.exists())
+
+    def test_reads_and_exempt_addresses_are_not_limited(self):
+        client = self.clients[0]
+        for _ in range(3):
+            response = client.get(
+                reverse('posts:add_comment', args=[self.post.pk])
+            )
+            self.assertEqual(response.status_code, 302)
+        with override_settings(THROTTLE_EXEMPT_IPS=[CLIENT_IP]):
+            for _ in range(3):
+                self.assertEqual(self.comment(client).status_code, 302)
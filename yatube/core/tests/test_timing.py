@@ -0,0 +1,104 @@
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import timing
+from posts.models import Post
+
+
+User = get_user_model()
+
+
+class HistogramTests(SimpleTestCase):
+    def test_percentiles_are_close_to_exact(self):
+        histogram = timing.Histogram()
+        for value in range(1, 1001):
+            histogram.add(value)
+        for share, exact in ((0.5, 500), (0.95, 950), (0.99, 990)):
+            with self.subTest(share=share):
+                self.assertAlmostEqual(
+                    histogram.percentile(share), exact, delta=exact * 0.25
+                )
+        self.assertEqual(histogram.percentile(1), 1000)
+
+    def test_merge_and_round_trip(self):
+        first, second = timing.Histogram(), timing.Histogram()
+        first.add(1)
+        second.add(100)
+        first.merge(timing.Histogram.from_dict(second.as_dict()))
+        self.assertEqual(sum(first.counts), 2)
+        self.assertEqual(first.total, 101)
+        self.assertEqual(first.maximum, 100)
+
+    def test_rolling_window_forgets_old_slots(self):
+        stats = timing.RollingStats()
+        now = 1_000_000
+        old = now - timing.WINDOW_SLOTS * timing.SLOT_SECONDS
+        stats.record('view', timing.RequestTimings(), 5, now=old)
+        stats.record('view', timing.RequestTimings(), 7, now=now)
+        snapshot = stats.snapshot(now=now)
+        self.assertEqual(snapshot['view'].counts['requests'], 1)
+
+    def test_span_outside_request_does_nothing(self):
+        with timing.span('render'):
+            timing.count('cache_hits')
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост', author=author)
+        cache.clear()
+        patcher = mock.patch.object(timing, 'stats', timing.RollingStats())
+        self.stats = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_header_reports_sql_render_and_cache(self):
+        first = self.client.get(reverse('posts:index'))
+        header = first['Server-Timing']
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="[1-9]\d* SQL"')
+        self.assertIn('render;dur=', header)
+        self.assertIn('total;dur=', header)
+        second = self.client.get(reverse('posts:index'))
+        self.assertRegex(second['Server-Timing'], r'cache;desc="hit [1-9]')
+        self.assertIn('desc="0 SQL"', second['Server-Timing'])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_requests_are_grouped_by_view_name(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        self.client.get('/no-such-page/')
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['posts:index'].counts['requests'], 2)
+        self.assertEqual(snapshot['unresolved'].counts['requests'], 1)
+
+    def test_stats_endpoint_is_staff_only(self):
+        url = reverse('server_timing_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = Client()
+        staff.force_login(
+            User.objects.create_user(username='staff', is_staff=True)
+        )
+        self.client.get(reverse('posts:index'))
+        response = staff.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', response.json()['views'])
+
+    def test_command_reads_published_stats(self):
+        self.client.get(reverse('posts:index'))
+        self.stats.publish()
+        output = StringIO()
+        call_command('server_timing', json=True, stdout=output)
+        summary = json.loads(output.getvalue())
+        self.assertGreaterEqual(summary['posts:index']['requests'], 1)
+        self.assertIn('total_p95', summary['posts:index'])
@@ -0,0 +1,128 @@
+"""Ограничение частоты записей: скользящее окно в общем кеше.
+
+Для каждого вида записи (scope) у клиента два ведра: по пользователю
+и по IP. Ведро пропускает N запросов за период лимита из
+THROTTLE_RATES, например ``'10/m'``. Запросы считаются счётчиками
+фиксированных окон длиной в период, а число за последний период
+оценивается как счётчик текущего окна плюс доля предыдущего. Если хоть
+одно ведро полно, view не вызывается, а клиент сразу получает 429
+с Retry-After.
+
+Счётчик увеличивается атомарным cache.incr до проверки и
+возвращается назад при отказе, поэтому параллельные запросы одного
+клиента не проходят сверх лимита.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from core import timing
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+BUCKET_KEY = 'throttle:{scope}:{kind}:{ident}'
+WINDOW_KEY = '{key}:{index}'
+
+
+def parse_rate(rate):
+    """'10/m' -> (10 токенов, 60 секунд)."""
+    number, _, period = rate.partition('/')
+    return int(number), PERIODS[period[:1]]
+
+
+def _wait(capacity, period, previous, count, elapsed):
+    """Сколько ждать, чтобы count-й запрос окна уложился в лимит."""
+    if previous * (1 - elapsed / period) + count <= capacity:
+        return 0
+    if count <= capacity:
+        # Ждём, пока вес предыдущего окна упадёт достаточно.
+        return period * (1 - (capacity - count) / previous) - elapsed
+    # Текущее окно полно само: ждём следующего, где оно станет
+    # предыдущим без этого запроса.
+    return period - elapsed + period * (1 - (capacity - 1) / (count - 1))
+
+
+def take(buckets, now=None):
+    """Засчитывает запрос в вёдрах {ключ: (лимит, период)}.
+
+    Возвращает 0, если запрос укладывается в лимиты, иначе сколько
+    секунд ждать. При отказе счётчики вёдер не меняются.
+    """
+    now = time.time() if now is None else now
+    windows = {}
+    for key, (capacity, period) in buckets.items():
+        index, elapsed = divmod(now, period)
+        windows[key] = (int(index), elapsed)
+    previous = cache.get_many([
+        WINDOW_KEY.format(key=key, index=index - 1)
+        for key, (index, _) in windows.items()
+    ])
+    counted = []
+    wait = 0
+    for key, (capacity, period) in buckets.items():
+        index, elapsed = windows[key]
+        current = WINDOW_KEY.format(key=key, index=index)
+        # Окно нужно ещё период после своего конца как предыдущее.
+        cache.add(current, 0, 2 * period)
+        counted.append(current)
+        count = cache.incr(current)
+        wait = max(wait, _wait(
+            capacity, period,
+            previous.get(WINDOW_KEY.format(key=key, index=index - 1), 0),
+            count, elapsed,
+        ))
+    if wait:
+        for current in counted:
+            cache.decr(current)
+    return wait
+
+
+def client_buckets(request, scope, rates):
+    idents = {'ip': request.META.get('REMOTE_ADDR')}
+    if request.user.is_authenticated:
+        idents['user'] = request.user.pk
+    return {
+        BUCKET_KEY.format(scope=scope, kind=kind, ident=ident):
+            parse_rate(rates[kind])
+        for kind, ident in idents.items()
+        if ident and kind in rates
+    }
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        content_type='text/plain; charset=utf-8',
+        status=429,
+    )
+    response['Retry-After'] = math.ceil(wait)
+    return response
+
+
+def throttle(scope, methods=('POST',)):
+    """Ограничивает view лимитами THROTTLE_RATES[scope].
+
+    Лимиты задаются по видам ключа: ``{'user': '10/m', 'ip': '50/m'}``.
+    Запросы с адресов THROTTLE_EXEMPT_IPS и запросы других методов
+    не ограничиваются.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rates = getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+            exempt = getattr(settings, 'THROTTLE_EXEMPT_IPS', ())
+            if (
+                rates and request.method in methods
+                and request.META.get('REMOTE_ADDR') not in exempt
+            ):
+                wait = take(client_buckets(request, scope, rates))
+                if wait:
+                    timing.count('throttled')
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
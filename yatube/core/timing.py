@@ -0,0 +1,317 @@
+"""Лёгкий замер запросов: SQL, рендер шаблонов, кеш, миниатюры.
+
+ServerTimingMiddleware открывает на время запроса RequestTimings,
+в который пишут execute_wrapper соединений, шаблонный бэкенд
+TimedDjangoTemplates, кеш TwoTierCache и код миниатюр через span()
+и count(). Вне запроса span() и count() ничего не делают.
+
+Итоги запроса уходят в заголовок Server-Timing и в скользящие
+гистограммы процесса по имени view. Раз в PUBLISH_SECONDS процесс
+кладёт снимок гистограмм в общий кеш, откуда их собирают страница
+статистики и команда server_timing: у каждого worker-процесса своя
+память, а кеш общий.
+"""
+import contextvars
+import os
+import socket
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+
+# Границы корзин гистограмм: геометрическая прогрессия с шагом 1.25
+# от 0.25 до ~30000, для миллисекунд и для числа запросов.
+BUCKET_BOUNDS = tuple(0.25 * 1.25 ** number for number in range(53))
+# Метрики с гистограммами: время в мс и число SQL-запросов. queue -
+# время задачи core.tasks в очереди до начала выполнения.
+HISTOGRAM_METRICS = (
+    'total', 'db', 'queries', 'render', 'thumbnails', 'queue',
+)
+# Метрики-суммы без распределения.
+COUNT_METRICS = (
+    'requests', 'cache_hits', 'cache_misses', 'throttled', 'failed',
+)
+
+SLOT_SECONDS = 60
+WINDOW_SLOTS = getattr(settings, 'SERVER_TIMING_WINDOW_MINUTES', 15)
+PUBLISH_SECONDS = 10
+PROCESSES_KEY = 'server_timing:processes'
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Накопленные за один запрос длительности в мс и счётчики."""
+
+    def __init__(self):
+        self.durations = {}
+        self.counts = {}
+        self.active = set()
+
+    def add(self, name, milliseconds):
+        self.durations[name] = self.durations.get(name, 0) + milliseconds
+
+    def count(self, name, number=1):
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', (time.perf_counter() - started) * 1000)
+            self.count('queries')
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def track_queries(timings):
+    """Считает в timings SQL-запросы всех соединений внутри блока."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(
+                connection.execute_wrapper(timings.execute_wrapper)
+            )
+        yield
+
+
+@contextmanager
+def span(name):
+    """Прибавляет время блока к метрике name текущего запроса.
+
+    Вложенный span с тем же именем не считается второй раз.
+    """
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(name)
+        timings.add(name, (time.perf_counter() - started) * 1000)
+
+
+def count(name, number=1):
+    timings = _current.get()
+    if timings is not None:
+        timings.count(name, number)
+
+
+def server_timing_header(timings, total):
+    """Значение заголовка Server-Timing по итогам запроса."""
+    durations, counts = timings.durations, timings.counts
+    parts = [
+        f'db;dur={durations.get("db", 0):.1f};'
+        f'desc="{counts.get("queries", 0)} SQL"'
+    ]
+    for name in ('render', 'thumbnails'):
+        if name in durations:
+            parts.append(f'{name};dur={durations[name]:.1f}')
+    if 'cache_hits' in counts or 'cache_misses' in counts:
+        parts.append(
+            f'cache;desc="hit {counts.get("cache_hits", 0)} '
+            f'miss {counts.get("cache_misses", 0)}"'
+        )
+    parts.append(f'total;dur={total:.1f}')
+    return ', '.join(parts)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами BUCKET_BOUNDS."""
+
+    def __init__(self, counts=None, total=0, maximum=0):
+        self.counts = counts or [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = total
+        self.maximum = maximum
+
+    def add(self, value):
+        self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        for index, number in enumerate(other.counts):
+            self.counts[index] += number
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def percentile(self, share):
+        """Оценка перцентиля: линейно внутри найденной корзины."""
+        size = sum(self.counts)
+        if not size:
+            return 0
+        rank = share * size
+        seen = 0
+        for index, number in enumerate(self.counts):
+            if number and seen + number >= rank:
+                lower = BUCKET_BOUNDS[index - 1] if index else 0
+                upper = (
+                    BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS)
+                    else self.maximum
+                )
+                upper = min(upper, self.maximum)
+                return lower + (upper - lower) * (rank - seen) / number
+            seen += number
+        return self.maximum
+
+    def as_dict(self):
+        return {
+            'counts': self.counts, 'total': self.total,
+            'maximum': self.maximum,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(list(data['counts']), data['total'], data['maximum'])
+
+
+class ViewStats:
+    """Метрики одного view за минуту или за всё окно."""
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNT_METRICS, 0)
+        self.histograms = {name: Histogram() for name in HISTOGRAM_METRICS}
+
+    def record(self, timings, total):
+        self.counts['requests'] += 1
+        for name in COUNT_METRICS[1:]:
+            self.counts[name] += timings.counts.get(name, 0)
+        self.histograms['total'].add(total)
+        self.histograms['queries'].add(timings.counts.get('queries', 0))
+        for name in ('db', 'render', 'thumbnails', 'queue'):
+            self.histograms[name].add(timings.durations.get(name, 0))
+
+    def merge(self, other):
+        for name, number in other.counts.items():
+            self.counts[name] += number
+        for name, histogram in other.histograms.items():
+            self.histograms[name].merge(histogram)
+
+    def as_dict(self):
+        return {
+            'counts': self.counts,
+            'histograms': {
+                name: histogram.as_dict()
+                for name, histogram in self.histograms.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.counts.update(data['counts'])
+        stats.histograms.update({
+            name: Histogram.from_dict(histogram)
+            for name, histogram in data['histograms'].items()
+        })
+        return stats
+
+
+class RollingStats:
+    """Скользящее окно из WINDOW_SLOTS минутных срезов по view."""
+
+    def __init__(self):
+        self.slots = {}
+        self.lock = threading.Lock()
+        self.published = 0
+
+    def record(self, view, timings, total, now=None):
+        slot = int((now or time.time()) // SLOT_SECONDS)
+        with self.lock:
+            views = self.slots.get(slot)
+            if views is None:
+                views = self.slots[slot] = {}
+                for old in [key for key in self.slots
+                            if key <= slot - WINDOW_SLOTS]:
+                    del self.slots[old]
+            views.setdefault(view, ViewStats()).record(timings, total)
+
+    def snapshot(self, now=None):
+        """{view: ViewStats} за всё окно."""
+        oldest = int((now or time.time()) // SLOT_SECONDS) - WINDOW_SLOTS
+        merged = {}
+        with self.lock:
+            for slot, views in self.slots.items():
+                if slot <= oldest:
+                    continue
+                for view, stats in views.items():
+                    merged.setdefault(view, ViewStats()).merge(stats)
+        return merged
+
+    def maybe_publish(self):
+        if time.time() - self.published >= PUBLISH_SECONDS:
+            self.publish()
+
+    def publish(self):
+        """Кладёт снимок процесса в общий кеш."""
+        now = self.published = time.time()
+        key = f'server_timing:{socket.gethostname()}:{os.getpid()}'
+        window = WINDOW_SLOTS * SLOT_SECONDS
+        cache.set(key, {
+            view: stats.as_dict()
+            for view, stats in self.snapshot(now).items()
+        }, window)
+        # Гонка двух процессов может потерять ключ, но каждый
+        # процесс возвращает себя в список при следующей публикации.
+        processes = cache.get(PROCESSES_KEY, {})
+        processes[key] = now
+        cache.set(PROCESSES_KEY, {
+            process: seen for process, seen in processes.items()
+            if seen > now - window
+        }, window)
+
+
+stats = RollingStats()
+
+
+def collected_stats():
+    """Сумма опубликованных снимков всех процессов: {view: ViewStats}."""
+    merged = {}
+    snapshots = cache.get_many(list(cache.get(PROCESSES_KEY, {})))
+    for snapshot in snapshots.values():
+        for view, data in snapshot.items():
+            merged.setdefault(view, ViewStats()).merge(
+                ViewStats.from_dict(data)
+            )
+    return merged
+
+
+def summary(view_stats):
+    """Плоская сводка по view для страницы статистики и команды."""
+    result = {}
+    for view, stats in sorted(view_stats.items()):
+        counts, histograms = stats.counts, stats.histograms
+        lookups = counts['cache_hits'] + counts['cache_misses']
+        result[view] = {
+            'requests': counts['requests'],
+            'throttled': counts['throttled'],
+            'failed': counts['failed'],
+            'cache_hit_ratio': (
+                round(counts['cache_hits'] / lookups, 3) if lookups else None
+            ),
+            **{
+                f'{metric}_{name}': round(
+                    histograms[metric].percentile(share), 2
+                )
+                for metric in HISTOGRAM_METRICS
+                for name, share in (('p50', 0.5), ('p95', 0.95),
+                                    ('p99', 0.99))
+            },
+        }
+    return result
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from core import tasks, timing
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -7,3 +11,14 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def server_timing_stats(request):
+    """Сводка замеров по view и задачам за окно и очередь задач."""
+    timing.stats.publish()
+    return JsonResponse({
+        'window_minutes': timing.WINDOW_SLOTS * timing.SLOT_SECONDS // 60,
+        'views': timing.summary(timing.collected_stats()),
+        'tasks': tasks.queue_stats(),
+    }, json_dumps_params={'ensure_ascii': False})
@@ -1,9 +1,24 @@
 from django.contrib import admin
 
+from . import search
 from .models import Post, Group, Comment
 
 
-class PostAdmin(admin.ModelAdmin):
+class FullTextSearchMixin:
+    """Поиск changelist через индекс FTS вместо LIKE по search_fields."""
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return (
+            search.filter_queryset(queryset, search_term, self.search_kind),
+            False,
+        )
+
+
+class PostAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = search.POST
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
@@ -11,7 +26,8 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
 
 
-class CommentsAdmin(admin.ModelAdmin):
+class CommentsAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = search.COMMENT
     list_display = ('pk', 'text', 'pub_date', 'author',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
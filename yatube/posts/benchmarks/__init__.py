@@ -0,0 +1,12 @@
+"""Микробенчмарки view лент на наборах данных разного размера.
+
+seed.py строит детерминированный набор данных (его же загружает
+команда seed_data), measure.py прогоняет
+view через тестовый клиент и собирает время, запросы и время рендера.
+Запуск: ``python manage.py benchmark_views --sizes 1000 100000``.
+``python manage.py benchmark_profiles`` делает тот же замер в каждом
+профиле настроек и показывает экономию боевого профиля.
+
+load.py - нагрузочный прогон смешанным трафиком из нескольких
+процессов: ``python manage.py load_test --processes 4 --rate 100``.
+"""
@@ -0,0 +1,247 @@
+"""Нагрузочный прогон смешанным трафиком.
+
+Несколько процессов одновременно гоняют запросы через обработчик
+тестового клиента (те же middleware, что и в WSGI-приложении, без
+проверки CSRF) к настоящей базе. Доли запросов задаёт смесь вида
+{endpoint: вес}, общий темп - rate запросов в секунду на все процессы.
+При заданном темпе задержка считается от запланированного момента
+запроса: если сервер не успевает, очередь входит в задержку, а не
+замедляет генератор.
+
+Модели импортируются внутри функций: процессы запускаются через spawn
+и импортируют этот модуль до django.setup().
+"""
+import os
+import random
+import time
+
+from django.db import OperationalError
+from django.urls import reverse
+
+
+DEFAULT_MIX = {
+    'index': 50,
+    'group_posts': 20,
+    'follow_index': 20,
+    'post_create': 3,
+    'add_comment': 5,
+    'profile_follow': 2,
+}
+ANONYMOUS = {'index', 'group_posts'}
+# Сколько кандидатов каждого вида выбирается для запросов.
+TARGETS_LIMIT = 1000
+# Сколько ждать, пока все процессы поднимут Django и войдут на сайт.
+BARRIER_TIMEOUT = 120
+
+
+def get_index(client, rng, targets):
+    return client.get(reverse('posts:index'), {'page': rng.randint(1, 5)})
+
+
+def get_group_posts(client, rng, targets):
+    return client.get(
+        reverse('posts:group_list', args=[rng.choice(targets['groups'])])
+    )
+
+
+def get_follow_index(client, rng, targets):
+    return client.get(reverse('posts:follow_index'))
+
+
+def post_create(client, rng, targets):
+    return client.post(reverse('posts:post_create'), {
+        'text': f'Нагрузочный пост {rng.random()}',
+    })
+
+
+def add_comment(client, rng, targets):
+    return client.post(
+        reverse('posts:add_comment', args=[rng.choice(targets['posts'])]),
+        {'text': f'Нагрузочный комментарий {rng.random()}'},
+    )
+
+
+def profile_follow(client, rng, targets):
+    return client.get(reverse(
+        'posts:profile_follow', args=[rng.choice(targets['authors'])]
+    ))
+
+
+# endpoint: (функция запроса, ожидаемый код ответа).
+REQUESTS = {
+    'index': (get_index, 200),
+    'group_posts': (get_group_posts, 200),
+    'follow_index': (get_follow_index, 200),
+    'post_create': (post_create, 302),
+    'add_comment': (add_comment, 302),
+    'profile_follow': (profile_follow, 302),
+}
+
+
+def parse_mix(items):
+    """Смесь из строк вида endpoint=вес."""
+    mix = {}
+    for item in items:
+        endpoint, _, weight = item.partition('=')
+        if endpoint not in REQUESTS:
+            raise ValueError(f'Неизвестный endpoint {endpoint!r}')
+        try:
+            mix[endpoint] = float(weight)
+        except ValueError:
+            raise ValueError(f'Неверный вес в {item!r}')
+    if not any(mix.values()):
+        raise ValueError('Все веса нулевые')
+    return mix
+
+
+def collect_targets(users):
+    """Группы, посты, авторы и читатели, к которым пойдут запросы.
+
+    Читатели - пользователи с наибольшим числом подписок, чтобы лента
+    подписок не была пустой.
+    """
+    from django.contrib.auth import get_user_model
+
+    from .. import counters
+    from ..models import Counter, Group, Post
+
+    User = get_user_model()
+    readers = list(Counter.objects.filter(
+        kind=counters.AUTHOR_FOLLOWING
+    ).order_by('-value').values_list('object_id', flat=True)[:users])
+    if not readers:
+        readers = list(User.objects.values_list('pk', flat=True)[:users])
+    return {
+        'groups': list(
+            Group.objects.values_list('slug', flat=True)[:TARGETS_LIMIT]
+        ),
+        'posts': list(Post.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:TARGETS_LIMIT]),
+        'authors': list(User.objects.order_by('-pk').values_list(
+            'username', flat=True
+        )[:TARGETS_LIMIT]),
+        'readers': readers,
+    }
+
+
+def percentile(values, share):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def call(client, endpoint, rng, targets):
+    """Выполняет запрос, возвращает исход: ok, error или lock."""
+    function, expected = REQUESTS[endpoint]
+    try:
+        response = function(client, rng, targets)
+    except OperationalError as error:
+        # Тестовый клиент пробрасывает исключения view наружу.
+        return 'lock' if 'locked' in str(error) else 'error'
+    except Exception:
+        return 'error'
+    return 'ok' if response.status_code == expected else 'error'
+
+
+def logged_in_clients(number, processes, targets):
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    readers = targets['readers'][number::processes] or targets['readers']
+    clients = []
+    for user in get_user_model().objects.filter(pk__in=readers):
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+    return clients
+
+
+def worker(number, options, targets, barrier, results):
+    """Процесс нагрузки, запускается через multiprocessing spawn."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    if options['database_file']:
+        settings.DATABASES['default']['NAME'] = options['database_file']
+    # DEBUG выключен, как в бою: иначе мерился бы debug_toolbar.
+    setup_test_environment(debug=False)
+    rng = random.Random(options['seed'] * 1000 + number)
+    anonymous = Client()
+    clients = logged_in_clients(number, options['processes'], targets)
+    # Процессы поднимают Django по-разному, а нагружать нужно вместе.
+    barrier.wait(timeout=BARRIER_TIMEOUT)
+    results.put(drive(rng, anonymous, clients, targets, options))
+
+
+def drive(rng, anonymous, clients, targets, options):
+    """Гоняет запросы options['seconds'] секунд.
+
+    Возвращает статистику по endpoint и фактическую длительность:
+    при перегрузке запланированные запросы дорабатываются после срока.
+    """
+    mix = options['mix']
+    endpoints, weights = list(mix), list(mix.values())
+    stats = {
+        endpoint: {'latencies': [], 'error': 0, 'lock': 0}
+        for endpoint in endpoints
+    }
+    interval = 0
+    if options['rate']:
+        interval = options['processes'] / options['rate']
+    started = scheduled = time.perf_counter()
+    deadline = scheduled + options['seconds']
+    while scheduled < deadline:
+        if interval:
+            time.sleep(max(scheduled - time.perf_counter(), 0))
+        else:
+            scheduled = time.perf_counter()
+        endpoint = rng.choices(endpoints, weights)[0]
+        client = (
+            anonymous if endpoint in ANONYMOUS or not clients
+            else rng.choice(clients)
+        )
+        outcome = call(client, endpoint, rng, targets)
+        if outcome == 'ok':
+            stats[endpoint]['latencies'].append(
+                time.perf_counter() - scheduled
+            )
+        else:
+            stats[endpoint][outcome] += 1
+        scheduled += interval
+    return {'stats': stats, 'elapsed': time.perf_counter() - started}
+
+
+def merge(collected):
+    """Складывает статистику процессов по endpoint."""
+    merged = {}
+    for stats in collected:
+        for endpoint, values in stats.items():
+            total = merged.setdefault(
+                endpoint, {'latencies': [], 'error': 0, 'lock': 0}
+            )
+            total['latencies'] += values['latencies']
+            total['error'] += values['error']
+            total['lock'] += values['lock']
+    return merged
+
+
+def summarize(values, seconds):
+    latencies = values['latencies']
+    failed = values['error'] + values['lock']
+    requests = len(latencies) + failed
+    return {
+        'requests': requests,
+        'rps': requests / seconds,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'error_rate': failed / requests if requests else 0,
+        'errors': values['error'],
+        'locks': values['lock'],
+    }
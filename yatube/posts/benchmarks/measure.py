@@ -0,0 +1,164 @@
+"""Замер view через тестовый клиент.
+
+Для каждого запроса считаются общее время, число SQL-запросов и их
+суммарное время, а также время рендера шаблонов (только внешний
+Template.render, вложенные include входят в него; запросы из шаблона
+учитываются и в нём, и во времени БД). Перед каждым
+запросом кеш очищается, чтобы мерить полный путь view, а не cache_page.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.template.base import Template
+from django.test import Client
+from django.urls import reverse
+
+from .. import counters
+from ..models import Counter, Group, Post
+from ..utils import CONST_SHOWED_POST
+
+
+User = get_user_model()
+
+
+@contextmanager
+def query_timer():
+    """Собирает в список время каждого SQL-запроса."""
+    timings = []
+
+    def timed_execute(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            timings.append(time.perf_counter() - started)
+
+    with connection.execute_wrapper(timed_execute):
+        yield timings
+
+
+@contextmanager
+def render_timer():
+    """Собирает в список время каждого внешнего рендера шаблона."""
+    original = Template.render
+    timings = []
+    depth = 0
+
+    def timed_render(template, context):
+        nonlocal depth
+        depth += 1
+        started = time.perf_counter()
+        try:
+            return original(template, context)
+        finally:
+            depth -= 1
+            if not depth:
+                timings.append(time.perf_counter() - started)
+
+    with mock.patch.object(Template, 'render', timed_render):
+        yield timings
+
+
+def heaviest(kind):
+    """id объекта с наибольшим значением счётчика kind."""
+    return Counter.objects.filter(kind=kind).order_by(
+        '-value'
+    ).values_list('object_id', flat=True).first()
+
+
+def benchmark_targets():
+    """URL для замера и пользователь для ленты подписок.
+
+    Берутся самые тяжёлые объекты набора: крупнейшая группа, самый
+    плодовитый автор, пост с наибольшим числом комментариев
+    и пользователь с наибольшим числом подписок.
+    """
+    group = Group.objects.get(pk=heaviest(counters.GROUP_POSTS))
+    author = User.objects.get(pk=heaviest(counters.AUTHOR_POSTS))
+    post_id = heaviest(counters.POST_COMMENTS)
+    reader = User.objects.get(pk=heaviest(counters.AUTHOR_FOLLOWING))
+    middle_page = max(Post.objects.count() // CONST_SHOWED_POST // 2, 1)
+    targets = {
+        'index': reverse('posts:index'),
+        'index_deep': f"{reverse('posts:index')}?page={middle_page}",
+        'group_posts': reverse('posts:group_list', args=[group.slug]),
+        'profile': reverse('posts:profile', args=[author.username]),
+        'post_detail': reverse('posts:post_detail', args=[post_id]),
+        'follow_index': reverse('posts:follow_index'),
+    }
+    return targets, reader
+
+
+def measure(client, url, repeat):
+    totals, db_times, render_times, queries = [], [], [], []
+    for _ in range(repeat):
+        cache.clear()
+        with query_timer() as sql, render_timer() as renders:
+            started = time.perf_counter()
+            response = client.get(url)
+            totals.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: ответ {response.status_code}')
+        queries.append(len(sql))
+        db_times.append(sum(sql))
+        render_times.append(sum(renders))
+    ordered = sorted(totals)
+    return {
+        'url': url,
+        'queries': max(queries),
+        'total_ms': round(statistics.median(totals) * 1000, 3),
+        'total_p95_ms': round(
+            ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000,
+            3,
+        ),
+        'db_ms': round(statistics.median(db_times) * 1000, 3),
+        'render_ms': round(statistics.median(render_times) * 1000, 3),
+    }
+
+
+def run(repeat=5, views=None):
+    """Замеряет все view на текущей базе, возвращает {view: метрики}."""
+    targets, reader = benchmark_targets()
+    anonymous = Client()
+    logged_in = Client()
+    logged_in.force_login(reader)
+    results = {}
+    for view, url in targets.items():
+        if views and view not in views:
+            continue
+        client = logged_in if view == 'follow_index' else anonymous
+        # Прогрев: импорт шаблонов и первые соединения не в счёт.
+        measure(client, url, 1)
+        results[view] = measure(client, url, repeat)
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Регрессии current относительно baseline.
+
+    Регрессия - рост медианы времени больше чем в threshold раз
+    или рост числа запросов на том же размере данных.
+    """
+    regressions = []
+    for size, views in current.items():
+        for view, metrics in views.items():
+            old = baseline.get(size, {}).get(view)
+            if old is None:
+                continue
+            ratio = metrics['total_ms'] / max(old['total_ms'], 0.001)
+            if ratio > threshold:
+                regressions.append(
+                    f'{size}/{view}: {old["total_ms"]} -> '
+                    f'{metrics["total_ms"]} мс (x{ratio:.2f})'
+                )
+            if metrics['queries'] > old['queries']:
+                regressions.append(
+                    f'{size}/{view}: запросов {old["queries"]} -> '
+                    f'{metrics["queries"]}'
+                )
+    return regressions
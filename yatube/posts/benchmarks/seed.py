@@ -0,0 +1,283 @@
+"""Детерминированный синтетический набор данных.
+
+Авторство постов и подписки распределены по степенному закону: немногие
+авторы пишут большую часть постов и собирают большую часть подписчиков,
+поэтому в наборе есть и популярные авторы, и пользователи с длинными
+лентами. Посты выходят всплесками, комментарии тяготеют к свежим
+постам. Тексты и имена собираются из словарей Faker, которые строятся
+один раз на набор: вызывать Faker на каждую строку слишком медленно.
+
+Строки пишутся bulk_create пачками, каждая пачка - в своей транзакции.
+Сигналы при bulk_create не работают, поэтому счётчики и ленты подписок
+в конце строятся отдельными запросами INSERT ... SELECT.
+"""
+import io
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from faker import Faker
+from PIL import Image
+
+from core.models import keep_pub_dates
+
+from .. import counters, feed_cache, search, timeline
+from ..models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+BATCH_SIZE = 10000
+# Показатель степенного закона для популярности авторов.
+POPULARITY_EXPONENT = 1.1
+# Посты набора в среднем равномерно покрывают этот период.
+START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+TIME_SPAN = timedelta(days=3 * 365)
+VOCABULARY_SIZE = 3000
+NAMES_POOL_SIZE = 500
+# Столько разных картинок-заглушек делят между собой посты с картинками.
+IMAGE_VARIANTS = 10
+IMAGE_PATH = 'posts/seed/{number}.jpg'
+
+
+def dataset_shape(posts):
+    """Число пользователей, групп, комментариев под число постов."""
+    return {
+        'users': max(posts // 50, 20),
+        'groups': max(posts // 2000, 3),
+        'comments': posts // 4,
+    }
+
+
+def popularity_weights(count):
+    return list(accumulate(
+        1 / (rank + 1) ** POPULARITY_EXPONENT for rank in range(count)
+    ))
+
+
+class Dictionary:
+    """Словари Faker, из которых случайно собираются тексты и имена."""
+
+    def __init__(self, rng, seed):
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        self.rng = rng
+        self.words = fake.words(VOCABULARY_SIZE)
+        self.usernames = [fake.user_name() for _ in range(NAMES_POOL_SIZE)]
+        self.first_names = [
+            fake.first_name() for _ in range(NAMES_POOL_SIZE)
+        ]
+        self.last_names = [fake.last_name() for _ in range(NAMES_POOL_SIZE)]
+
+    def text(self, words):
+        text = ' '.join(self.rng.choices(self.words, k=words))
+        return text[0].upper() + text[1:]
+
+
+def in_batches(objects, batch_size=BATCH_SIZE):
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(posts, seed=0, image_share=0.1, stdout=None, shape=None,
+         batch_size=BATCH_SIZE, derived=True):
+    """Заполняет пустую базу набором из posts постов.
+
+    shape переопределяет число пользователей, групп и комментариев,
+    которое иначе выводится из posts. derived=False оставляет
+    счётчики, ленты и поисковый индекс непостроенными.
+    """
+    rng = random.Random(seed)
+    dictionary = Dictionary(rng, seed)
+    shape = {**dataset_shape(posts), **(shape or {}), 'posts': posts}
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    def insert(model, objects):
+        for batch in in_batches(objects, batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+
+    insert(User, generate_users(dictionary, shape['users']))
+    insert(Group, generate_groups(dictionary, shape['groups']))
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    group_ids = list(
+        Group.objects.order_by('pk').values_list('pk', flat=True)
+    )
+    weights = popularity_weights(len(user_ids))
+    log(f'Пользователей: {len(user_ids)}, групп: {len(group_ids)}')
+    images = create_images() if image_share else []
+    with keep_pub_dates(Post, Comment, Follow):
+        insert(Post, generate_posts(
+            rng, dictionary, shape, user_ids, group_ids, weights,
+            images, image_share,
+        ))
+        log(f'Постов: {posts}')
+        insert(Comment, generate_comments(rng, dictionary, shape, user_ids))
+        log(f'Комментариев: {shape["comments"]}')
+        insert(Follow, generate_follows(rng, user_ids, weights))
+        log(f'Подписок: {Follow.objects.count()}')
+    if derived:
+        rebuild_derived()
+        log('Счётчики, ленты и поисковый индекс построены')
+
+
+def rebuild_derived():
+    with transaction.atomic():
+        counters.rebuild()
+        rebuild_timelines()
+        search.rebuild()
+    feed_cache.invalidate(feed_cache.NAMES_SCOPE)
+
+
+def create_images():
+    """Картинки-заглушки разных цветов, общие для всех постов."""
+    names = []
+    for number in range(IMAGE_VARIANTS):
+        name = IMAGE_PATH.format(number=number)
+        if not default_storage.exists(name):
+            content = io.BytesIO()
+            Image.new(
+                'RGB', (960, 540), (number * 25, 120, 255 - number * 25)
+            ).save(content, 'JPEG')
+            name = default_storage.save(name, ContentFile(content.getvalue()))
+        names.append(name)
+    return names
+
+
+def generate_users(dictionary, count):
+    password = make_password(None)
+    rng = dictionary.rng
+    for number in range(count):
+        # Номер делает имя уникальным при любом размере набора.
+        yield User(
+            username=f'{rng.choice(dictionary.usernames)}_{number}',
+            first_name=rng.choice(dictionary.first_names),
+            last_name=rng.choice(dictionary.last_names),
+            password=password,
+        )
+
+
+def generate_groups(dictionary, count):
+    for number in range(count):
+        yield Group(
+            title=dictionary.text(2), slug=f'group-{number}',
+            description=dictionary.text(12),
+        )
+
+
+def post_date(shape, number):
+    """Примерная дата поста с порядковым номером number."""
+    return START_DATE + TIME_SPAN * (number / max(shape['posts'], 1))
+
+
+def generate_posts(rng, dictionary, shape, user_ids, group_ids, weights,
+                   images, image_share):
+    """Посты идут пачками: периоды затишья сменяются всплесками."""
+    mean_gap = TIME_SPAN.total_seconds() / max(shape['posts'], 1)
+    moment = START_DATE
+    for _ in range(shape['posts']):
+        # Средний интервал сохраняется: 0.2 * 0.05 + 0.8 * 1.2 ~ 1.
+        burst = rng.random() < 0.2
+        moment += timedelta(seconds=rng.expovariate(
+            1 / (mean_gap * (0.05 if burst else 1.2))
+        ))
+        yield Post(
+            text=dictionary.text(rng.randint(5, 60)),
+            author_id=rng.choices(user_ids, cum_weights=weights)[0],
+            group_id=(
+                rng.choice(group_ids)
+                if group_ids and rng.random() < 0.6 else None
+            ),
+            image=(
+                rng.choice(images)
+                if images and rng.random() < image_share else ''
+            ),
+            pub_date=moment,
+        )
+
+
+def generate_comments(rng, dictionary, shape, user_ids):
+    """Комментарии тяготеют к свежим постам."""
+    first_post = Post.objects.order_by('pk').values_list(
+        'pk', flat=True
+    ).first()
+    last_post = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first()
+    if first_post is None:
+        return
+    # Возраст комментируемого поста распределён экспоненциально,
+    # в среднем это пятая часть набора, но не меньше 200 постов.
+    mean_age = max((last_post - first_post) / 5, 200)
+    for _ in range(shape['comments']):
+        post_id = last_post - min(
+            int(rng.expovariate(1 / mean_age)), last_post - first_post
+        )
+        yield Comment(
+            text=dictionary.text(rng.randint(3, 20)),
+            author_id=rng.choice(user_ids),
+            post_id=post_id,
+            pub_date=post_date(shape, post_id - first_post) + timedelta(
+                seconds=rng.expovariate(1 / 3600)
+            ),
+        )
+
+
+def generate_follows(rng, user_ids, weights):
+    """Число подписок по Парето, авторы - по популярности.
+
+    Популярность авторов степенная, поэтому и число подписчиков
+    распределено по степенному закону.
+    """
+    for user_id in user_ids:
+        following = min(int(rng.paretovariate(1.2)) * 3, 200)
+        authors = set(rng.choices(user_ids, cum_weights=weights, k=following))
+        authors.discard(user_id)
+        for author_id in sorted(authors):
+            yield Follow(
+                user_id=user_id, author_id=author_id, pub_date=START_DATE
+            )
+
+
+@contextmanager
+def indexes_dropped(table):
+    """Снимает обычные индексы table и создаёт их заново на выходе.
+
+    Построить индекс по готовой таблице - одна сортировка, а вставка
+    миллионов строк в вразнобой упорядоченный индекс - случайные
+    записи по всему файлу. Индексы ограничений уникальности остаются.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            'AND tbl_name = %s AND sql IS NOT NULL',
+            [table],
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    yield
+    with connection.cursor() as cursor:
+        for _, sql in indexes:
+            cursor.execute(sql)
+
+
+def rebuild_timelines():
+    """Ленты подписок набора, индекс ленты строится после вставки."""
+    with indexes_dropped('posts_timelineentry'):
+        timeline.rebuild()
@@ -0,0 +1,46 @@
+"""Условный GET страницы поста.
+
+Страница поста не кешируется целиком, поэтому её валидаторы берутся
+из updated_at поста одним лёгким запросом. updated_at сдвигается
+при правке поста, при записи и удалении его комментариев и после
+создания миниатюр. Имя автора и число его постов на странице
+учитываются через поколения областей feed_cache.
+
+Last-Modified не отдаётся: по одной дате нельзя учесть ни пользователя,
+ни имена, ни csrf-токен на странице, и If-Modified-Since без ETag
+вернул бы 304 со старой страницей.
+"""
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from . import feed_cache
+from .models import Post
+
+
+def touch_post(post_id):
+    """Сдвигает updated_at поста без сигналов сохранения."""
+    Post.objects.filter(pk=post_id).update(updated_at=timezone.now())
+
+
+def post_etag(request, post_id):
+    """ETag страницы поста или None, если поста нет; один на запрос."""
+    if not hasattr(request, '_post_etag'):
+        row = Post.objects.filter(pk=post_id).values_list(
+            'updated_at', 'author__username'
+        ).first()
+        etag = None
+        if row is not None:
+            updated_at, username = row
+            versions = '.'.join([
+                updated_at.isoformat(),
+                *feed_cache.generations([
+                    feed_cache.NAMES_SCOPE,
+                    feed_cache.profile_scope(username),
+                ]),
+            ])
+            etag = feed_cache.page_etag(request, versions)
+        request._post_etag = etag
+    return request._post_etag
+
+
+post_condition = condition(etag_func=post_etag)
@@ -0,0 +1,88 @@
+"""Денормализованные счётчики постов, подписчиков и комментариев.
+
+Значения хранятся в отдельной таблице Counter, а не в колонках моделей,
+чтобы сохранение поста или группы через форму не затирало счётчик,
+увеличенный параллельным запросом.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Counter
+
+
+AUTHOR_POSTS = Counter.AUTHOR_POSTS
+AUTHOR_FOLLOWERS = Counter.AUTHOR_FOLLOWERS
+AUTHOR_FOLLOWING = Counter.AUTHOR_FOLLOWING
+GROUP_POSTS = Counter.GROUP_POSTS
+POST_COMMENTS = Counter.POST_COMMENTS
+
+# Тип счётчика: (таблица, поле, по которому считаются строки).
+SQL_SOURCES = {
+    AUTHOR_POSTS: ('posts_post', 'author_id'),
+    AUTHOR_FOLLOWERS: ('posts_follow', 'author_id'),
+    AUTHOR_FOLLOWING: ('posts_follow', 'user_id'),
+    GROUP_POSTS: ('posts_post', 'group_id'),
+    POST_COMMENTS: ('posts_comment', 'post_id'),
+}
+
+
+def bump(kind, object_id, delta=1):
+    """Атомарно изменяет счётчик на delta через F()."""
+    updated = Counter.objects.filter(
+        kind=kind, object_id=object_id
+    ).update(value=F('value') + delta)
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            Counter.objects.create(
+                kind=kind, object_id=object_id, value=delta
+            )
+    except IntegrityError:
+        Counter.objects.filter(
+            kind=kind, object_id=object_id
+        ).update(value=F('value') + delta)
+
+
+def get(kind, object_id) -> int:
+    value = Counter.objects.filter(
+        kind=kind, object_id=object_id
+    ).values_list('value', flat=True).first()
+    return value or 0
+
+
+def get_many(kind, object_ids) -> dict:
+    """Значения счётчиков для набора объектов одним запросом."""
+    values = dict(
+        Counter.objects.filter(
+            kind=kind, object_id__in=object_ids
+        ).values_list('object_id', 'value')
+    )
+    return {object_id: values.get(object_id, 0) for object_id in object_ids}
+
+
+def author_counters(author_id) -> dict:
+    values = dict(
+        Counter.objects.filter(
+            object_id=author_id,
+            kind__in=(AUTHOR_POSTS, AUTHOR_FOLLOWERS, AUTHOR_FOLLOWING),
+        ).values_list('kind', 'value')
+    )
+    return {
+        'posts': values.get(AUTHOR_POSTS, 0),
+        'followers': values.get(AUTHOR_FOLLOWERS, 0),
+        'following': values.get(AUTHOR_FOLLOWING, 0),
+    }
+
+
+def rebuild():
+    """Пересчитывает все счётчики по таблицам запросами INSERT ... SELECT."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM posts_counter')
+        for kind, (table, field) in SQL_SOURCES.items():
+            cursor.execute(
+                'INSERT INTO posts_counter (kind, object_id, value) '
+                f'SELECT %s, {field}, COUNT(*) FROM {table} '
+                f'WHERE {field} IS NOT NULL GROUP BY {field}',
+                [kind],
+            )
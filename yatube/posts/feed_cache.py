@@ -0,0 +1,187 @@
+"""Кеш страниц лент с инвалидацией по поколениям.
+
+Каждая страница зависит от набора областей (scope): главная, группа,
+профиль, лента подписок. У каждой области в кеше хранится токен
+поколения, и он входит в ключ закешированной страницы. Запись
+в базу заменяет токены затронутых областей, после чего старые страницы
+становятся недостижимы и спокойно доживают свой таймаут.
+
+Вместе с токеном хранится время записи. Пока оно не старше
+DATABASE_STICKY_SECONDS, страница собирается по основной базе, а не
+по реплике: отстающая реплика ещё не видит записи, и устаревшая
+страница закешировалась бы под новым поколением.
+
+Из тех же поколений собирается ETag страницы: повторный запрос
+с совпавшим If-None-Match получает 304 ещё до поиска в кеше.
+"""
+import time
+import uuid
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core.db import routers
+
+from . import timeline
+from .models import Follow, Group
+
+
+FEED_CACHE_TIMEOUT = getattr(settings, 'FEED_CACHE_TIMEOUT', 60 * 60 * 6)
+GENERATION_KEY = 'feed_generations:{}'
+
+INDEX_SCOPE = 'index'
+# Имена авторов и названия групп видны на всех страницах.
+NAMES_SCOPE = 'names'
+# Посты популярных авторов подмешиваются во все ленты подписок.
+POPULAR_FOLLOW_SCOPE = 'follow:popular'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def profile_scope(username):
+    return f'profile:{username}'
+
+
+def follow_scope(user_id):
+    return f'follow:{user_id}'
+
+
+def follow_feed_scopes(author_id):
+    """Ленты подписок, в которых видны посты автора."""
+    if timeline.is_popular(author_id):
+        return [POPULAR_FOLLOW_SCOPE]
+    return [
+        follow_scope(user_id)
+        for user_id in Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+    ]
+
+
+def post_feed_scopes(post):
+    """Области, на страницах которых виден пост."""
+    scopes = [
+        INDEX_SCOPE,
+        profile_scope(post.author.username),
+        *follow_feed_scopes(post.author_id),
+    ]
+    group_ids = {post.group_id, getattr(post, '_previous_group_id', None)}
+    group_ids.discard(None)
+    scopes += [
+        group_scope(slug)
+        for slug in Group.objects.filter(pk__in=group_ids).values_list(
+            'slug', flat=True
+        )
+    ]
+    return scopes
+
+
+def _new_generation():
+    return uuid.uuid4().hex[:8], time.time()
+
+
+def generation_entries(scopes):
+    """Поколения областей: пары (токен, время записи).
+
+    Поколение, которого нет в кеше, считается только что записанным:
+    неизвестно, когда его вытеснили.
+    """
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    entries = cache.get_many(keys)
+    for key in keys:
+        if key not in entries:
+            cache.add(key, _new_generation(), None)
+            entries[key] = cache.get(key)
+    return [entries[key] for key in keys]
+
+
+def generations(scopes):
+    """Текущие токены поколений для списка областей."""
+    return [token for token, _ in generation_entries(scopes)]
+
+
+def written_recently(entries):
+    """Могла ли реплика ещё не догнать запись в одну из областей."""
+    window = getattr(settings, 'DATABASE_STICKY_SECONDS', 15)
+    return max(written for _, written in entries) > time.time() - window
+
+
+def invalidate(*scopes):
+    """Меняет поколения областей сейчас и ещё раз после коммита.
+
+    Между заменой и коммитом параллельный читатель может закешировать
+    страницу по старому снимку базы; повторная замена после коммита
+    делает такую страницу недостижимой, а время записи отсчитывается
+    от коммита. Вне транзакции on_commit выполняет замену сразу.
+    """
+    if not scopes:
+        return
+    keys = [GENERATION_KEY.format(scope) for scope in set(scopes)]
+
+    def renew():
+        cache.set_many({key: _new_generation() for key in keys}, None)
+
+    renew()
+    transaction.on_commit(renew)
+
+
+def page_etag(request, versions):
+    """ETag страницы: версии данных, пользователь и адрес с параметрами.
+
+    Страница несёт csrf-токен, поэтому в ETag входят секрет CSRF
+    и ключ сессии: после нового входа браузер не получит 304 со старым
+    токеном в форме.
+    """
+    client = '|'.join([
+        str(request.user.pk),
+        request.META.get('CSRF_COOKIE', ''),
+        request.session.session_key or '',
+    ])
+    return md5(
+        f'{versions}|{client}|{request.get_full_path()}'.encode()
+    ).hexdigest()
+
+
+def cache_feed(*scope_templates):
+    """cache_page, ключ которого включает поколения областей страницы.
+
+    Шаблоны областей форматируются аргументами view и user_id
+    текущего пользователя, например ``cache_feed('group:{slug}')``.
+    """
+    def decorator(view):
+        # Vary: Cookie нужен уже на уровне view: SessionMiddleware
+        # добавляет его позже, чем cache_page сохраняет ответ.
+        view = vary_on_cookie(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            scopes = [NAMES_SCOPE] + [
+                template.format(user_id=request.user.pk, **kwargs)
+                for template in scope_templates
+            ]
+            entries = generation_entries(scopes)
+            versions = '.'.join(
+                f'{scope}={token}'
+                for scope, (token, _) in zip(scopes, entries)
+            )
+            if written_recently(entries):
+                routers.use_primary()
+            key_prefix = 'feed.' + md5(versions.encode()).hexdigest()
+            cached_view = cache_page(
+                FEED_CACHE_TIMEOUT, key_prefix=key_prefix
+            )(view)
+            etag = page_etag(request, versions)
+            conditional_view = condition(
+                etag_func=lambda *args, **kwargs: etag
+            )(cached_view)
+            return conditional_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
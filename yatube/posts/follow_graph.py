@@ -0,0 +1,83 @@
+"""Граф подписок в кеше.
+
+Для каждого пользователя в кеше лежат отсортированные id авторов,
+на которых он подписан (array('q') в байтах, 8 байт на подписку).
+«A подписан на B» проверяется бинарным поиском по массиву. Подписка
+и отписка удаляют запись пользователя, отсутствующая запись читается
+из базы при первом обращении.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+
+FOLLOW_GRAPH_TIMEOUT = getattr(settings, 'FOLLOW_GRAPH_TIMEOUT', 60 * 60 * 24)
+FOLLOWING_KEY = 'follow_graph:following:{}'
+
+
+def _unpack(data):
+    ids = array('q')
+    ids.frombytes(data)
+    return ids
+
+
+def _store_following(user_id, ids):
+    cache.set(
+        FOLLOWING_KEY.format(user_id), ids.tobytes(), FOLLOW_GRAPH_TIMEOUT
+    )
+
+
+def _contains(ids, author_id):
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def following_ids(user_id) -> array:
+    """Отсортированные id авторов, на которых подписан пользователь."""
+    data = cache.get(FOLLOWING_KEY.format(user_id))
+    if data is not None:
+        return _unpack(data)
+    # Порядок author_id отдаёт уникальный индекс (user, author).
+    ids = array('q', Follow.objects.filter(user_id=user_id).order_by(
+        'author_id'
+    ).values_list('author_id', flat=True))
+    _store_following(user_id, ids)
+    return ids
+
+
+def follows(user_id, author_id) -> bool:
+    """Подписан ли user_id на author_id; для гостя (None) - нет."""
+    if user_id is None:
+        return False
+    return _contains(following_ids(user_id), author_id)
+
+
+def _drop(user_id):
+    """Удаляет запись графа пользователя сейчас и после коммита.
+
+    Правка массива на месте теряла бы параллельные подписки, а
+    читатель до коммита может положить в кеш старый граф; повторное
+    удаление после коммита убирает и его.
+    """
+    key = FOLLOWING_KEY.format(user_id)
+
+    def drop():
+        cache.delete(key)
+
+    drop()
+    transaction.on_commit(drop)
+
+
+def followed(user_id, author_id):
+    """Сбрасывает граф после подписки user_id на author_id."""
+    _drop(user_id)
+
+
+def unfollowed(user_id, author_id):
+    """Сбрасывает граф после отписки user_id от author_id."""
+    _drop(user_id)
@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import Textarea
+from .images import ingest_image
 from .models import Post, Comment
 
 
@@ -19,6 +21,12 @@ class PostForm(forms.ModelForm):
             'group': 'Выберите группу к которой относится пост',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            return ingest_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
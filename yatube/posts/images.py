@@ -0,0 +1,94 @@
+"""Приём картинок постов: ограничение размера и перекодирование.
+
+Загрузка пишется на диск (см. FILE_UPLOAD_HANDLERS), размер в пикселях
+проверяется по заголовку до декодирования, затем картинка уменьшается
+до POST_IMAGE_MAX_SIZE и сохраняется заново без метаданных. GIF
+перекодируется покадрово и остаётся анимированным.
+"""
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps, ImageSequence
+
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+# Допустимые значения POST_IMAGE_FORMAT, проверяет core.checks.
+POST_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+
+
+def _gif_frames(image, max_size):
+    """Кадры GIF заново, без комментариев и блоков расширений.
+
+    Анимация и длительность кадров сохраняются.
+    """
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(image):
+        durations.append(frame.info.get('duration', 0))
+        frame = frame.convert('RGBA')
+        frame.thumbnail(max_size, Image.LANCZOS)
+        # convert копирует info кадра, а с ним и комментарий.
+        frame.info = {}
+        frames.append(frame)
+    save_options = {
+        'save_all': True, 'append_images': frames[1:],
+        'duration': durations, 'disposal': 2, 'optimize': True,
+    }
+    if 'loop' in image.info:
+        save_options['loop'] = image.info['loop']
+    return frames[0], save_options
+
+
+def _reencode(image, max_size):
+    """(картинка, формат, параметры save) уменьшенной копии."""
+    if image.format == 'GIF':
+        return ('GIF', *_gif_frames(image, max_size))
+    # Для JPEG draft декодирует сразу в уменьшенном масштабе.
+    image.draft('RGB', max_size)
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(max_size, Image.LANCZOS)
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    if has_alpha:
+        return 'PNG', image.convert('RGBA'), {'optimize': True}
+    image_format = settings.POST_IMAGE_FORMAT
+    save_options = {'quality': settings.POST_IMAGE_QUALITY, 'optimize': True}
+    if image_format == 'JPEG':
+        save_options['progressive'] = True
+    return image_format, image.convert('RGB'), save_options
+
+
+def ingest_image(upload):
+    """Возвращает уменьшенную и очищенную от метаданных копию upload.
+
+    Заголовок проверяет только Image.open, обрезанные и битые данные
+    обнаруживаются при декодировании; и то и другое - ошибка формы.
+    """
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+        width, height = image.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                'Изображение слишком большое: %(pixels)s пикселей.',
+                code='too_many_pixels',
+                params={'pixels': width * height},
+            )
+        image_format, image, save_options = _reencode(
+            image, settings.POST_IMAGE_MAX_SIZE
+        )
+        output = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        # Новая картинка создаётся без exif и прочих метаданных.
+        image.save(output, image_format, **save_options)
+    except (OSError, SyntaxError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Загрузите правильное изображение.', code='invalid_image'
+        )
+    output.seek(0)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return File(output, name=f'{stem}.{EXTENSIONS[image_format]}')
@@ -0,0 +1,72 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from yatube.settings import PROFILES
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет view лент benchmark_views в каждом профиле настроек '
+        'и показывает, сколько экономит боевой профиль на запросе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--db-dir', default=None,
+            help='Каталог для баз наборов данных, общий для профилей',
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as temporary:
+            db_dir = options['db_dir'] or temporary
+            results = {
+                profile: self.run_profile(profile, db_dir, temporary, options)
+                for profile in PROFILES
+            }
+        base, lean = results['development'], results['production']
+        self.stdout.write(
+            f"{'набор':>8} {'view':<13} {'dev мс':>9} {'prod мс':>9} "
+            f"{'экономия мс':>12} {'%':>6} {'запросов':>9}"
+        )
+        for size, views in lean.items():
+            for view, metrics in views.items():
+                before = base[size][view]
+                saved = before['total_ms'] - metrics['total_ms']
+                self.stdout.write(
+                    f"{size:>8} {view:<13} {before['total_ms']:>9.2f} "
+                    f"{metrics['total_ms']:>9.2f} {saved:>12.2f} "
+                    f"{saved / before['total_ms'] * 100:>6.1f} "
+                    f"{before['queries']:>4}/{metrics['queries']:<4}"
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты записаны в {options['output']}")
+
+    def run_profile(self, profile, db_dir, temporary, options):
+        """benchmark_views в отдельном процессе с профилем profile."""
+        output = os.path.join(temporary, f'{profile}.json')
+        env = {**os.environ, 'YATUBE_SETTINGS_PROFILE': profile}
+        # Ключ нужен только для запуска профиля, сессии бенчмарка временные.
+        env.setdefault('YATUBE_SECRET_KEY', 'benchmark-profiles')
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+            'benchmark_views', '--as-configured',
+            '--sizes', *map(str, options['sizes']),
+            '--repeat', str(options['repeat']),
+            '--db-dir', db_dir, '--output', output,
+        ]
+        self.stdout.write(f'Профиль {profile}')
+        if subprocess.run(command, env=env).returncode:
+            raise CommandError(f'benchmark_views упал в профиле {profile}')
+        with open(output, encoding='utf-8') as result:
+            return json.load(result)['results']
@@ -0,0 +1,146 @@
+import json
+import os
+import platform
+import sqlite3
+import tempfile
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings, setup_test_environment, teardown_test_environment,
+)
+
+from posts.benchmarks import measure, seed
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет view лент на наборах данных разного размера '
+        'и сохраняет результаты в JSON для сравнения прогонов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 100000, 1000000],
+            help='Размеры наборов данных в постах',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--views', nargs='+', default=None,
+            help='Замерять только эти view (index, group_posts, ...)',
+        )
+        parser.add_argument(
+            '--db-dir', default=None,
+            help='Каталог для баз наборов данных. Базы сохраняются '
+                 'между запусками, и заполнять их заново не нужно',
+        )
+        parser.add_argument('--output', help='Файл для результатов JSON')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=1.25,
+            help='Во сколько раз может вырасти медиана времени',
+        )
+        parser.add_argument(
+            '--as-configured', action='store_true',
+            help='Мерить с DEBUG из настроек, а не выключенным; '
+                 'так сравнивает профили benchmark_profiles',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк рассчитан на SQLite')
+        db_dir = options['db_dir']
+        temporary = None
+        if db_dir is None:
+            temporary = tempfile.TemporaryDirectory()
+            db_dir = temporary.name
+        os.makedirs(db_dir, exist_ok=True)
+        cache_settings = {
+            'default': {
+                **settings.CACHES['default'],
+                'LOCATION': os.path.join(db_dir, 'cache.sqlite3'),
+            }
+        }
+        results = {}
+        # По умолчанию DEBUG выключен, как в бою: иначе мерился бы
+        # debug_toolbar.
+        setup_test_environment(
+            debug=None if options['as_configured'] else False
+        )
+        try:
+            with override_settings(
+                CACHES=cache_settings,
+                MEDIA_ROOT=os.path.join(db_dir, 'media'),
+            ):
+                for size in options['sizes']:
+                    results[str(size)] = self.run_size(size, db_dir, options)
+        finally:
+            teardown_test_environment()
+            if temporary is not None:
+                temporary.cleanup()
+
+        report = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'repeat': options['repeat'],
+                'seed': options['seed'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты записаны в {options['output']}")
+        if options['compare']:
+            self.compare(options['compare'], results, options['threshold'])
+
+    def run_size(self, size, db_dir, options):
+        connection.settings_dict['TEST']['NAME'] = os.path.join(
+            db_dir, f'benchmark-{size}-{options["seed"]}.sqlite3'
+        )
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=True, serialize=False,
+        )
+        try:
+            existing = Post.objects.count()
+            if existing not in (0, size):
+                raise CommandError(
+                    f'В базе набора {size} уже {existing} постов'
+                )
+            if not existing:
+                self.stdout.write(f'Заполнение набора из {size} постов')
+                seed.seed(size, seed=options['seed'], stdout=self.stdout)
+            views = measure.run(options['repeat'], options['views'])
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=True
+            )
+        self.stdout.write(
+            f"{size:>8} {'view':<13} {'мс':>9} {'p95 мс':>9} "
+            f"{'БД мс':>9} {'рендер мс':>10} {'запросов':>8}"
+        )
+        for view, metrics in views.items():
+            self.stdout.write(
+                f"{'':>8} {view:<13} {metrics['total_ms']:>9.2f} "
+                f"{metrics['total_p95_ms']:>9.2f} {metrics['db_ms']:>9.2f} "
+                f"{metrics['render_ms']:>10.2f} {metrics['queries']:>8}"
+            )
+        return views
+
+    def compare(self, path, results, threshold):
+        with open(path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)['results']
+        regressions = measure.compare(baseline, results, threshold)
+        if regressions:
+            raise CommandError(
+                'Найдены регрессии:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,93 @@
+import datetime
+import gzip
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+# Тип записи: (queryset, поля). Порядок важен: при импорте группы
+# и пользователи должны встретиться раньше постов, посты - раньше
+# комментариев.
+EXPORT_SOURCES = {
+    'group': (Group.objects.all(), ('slug', 'title', 'description')),
+    'user': (
+        User.objects.all(),
+        ('username', 'first_name', 'last_name', 'email', 'date_joined'),
+    ),
+    'post': (
+        Post.objects.all(),
+        ('id', 'text', 'pub_date', 'image', 'author__username',
+         'group__slug'),
+    ),
+    'comment': (
+        Comment.objects.filter(post__isnull=False),
+        ('id', 'text', 'pub_date', 'post_id', 'author__username'),
+    ),
+    'follow': (
+        Follow.objects.all(),
+        ('pub_date', 'user__username', 'author__username'),
+    ),
+}
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder без округления времени до миллисекунд:
+    по pub_date импорт узнаёт уже загруженные посты и комментарии."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def open_output(path):
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии, подписки и их авторов в JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help='Файл для выгрузки (.gz - со сжатием), по умолчанию stdout',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за один запрос',
+        )
+        parser.add_argument(
+            '--progress-every', type=int, default=100000,
+            help='Как часто сообщать о прогрессе, в строках',
+        )
+
+    def handle(self, *args, **options):
+        encoder = ExportEncoder(ensure_ascii=False)
+        output = open_output(options['output'])
+        try:
+            for record_type, (queryset, fields) in EXPORT_SOURCES.items():
+                rows = queryset.order_by('pk').values(*fields).iterator(
+                    chunk_size=options['chunk_size']
+                )
+                written = 0
+                for row in rows:
+                    row['type'] = record_type
+                    output.write(encoder.encode(row))
+                    output.write('\n')
+                    written += 1
+                    if written % options['progress_every'] == 0:
+                        self.stderr.write(f'{record_type}: {written}')
+                self.stderr.write(f'{record_type}: выгружено {written}')
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,49 @@
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache, thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для всех картинок постов в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.POST_THUMBNAIL_WORKERS,
+            help='Число процессов; 0 - создавать в текущем процессе',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50,
+            help='Сколько постов отдавать процессу за раз',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = Post.objects.exclude(image='').order_by('pk').values_list(
+            'pk', flat=True
+        ).iterator(chunk_size=2000)
+        generate = partial(thumbnails.generate_thumbnails, invalidate=False)
+        workers = options['workers']
+        # Отдаём пулу посты порциями, чтобы не держать в памяти все id.
+        batch_size = options['chunk_size'] * max(workers, 1) * 4
+        done = 0
+        while True:
+            batch = list(islice(post_ids, batch_size))
+            if not batch:
+                break
+            if workers:
+                executor = thumbnails.get_executor(workers)
+                done += sum(1 for _ in executor.map(
+                    generate, batch, chunksize=options['chunk_size']
+                ))
+            else:
+                done += sum(1 for _ in map(generate, batch))
+            self.stdout.write(f'Обработано постов: {done}')
+        # Картинки видны во всех лентах: сбрасываем их кеш разом.
+        feed_cache.invalidate(feed_cache.NAMES_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, обработано постов: {done}'
+        ))
@@ -0,0 +1,322 @@
+import gzip
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from core.models import keep_pub_dates
+from posts import counters, feed_cache, search, timeline
+from posts.models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+
+def insert_new(model, objects):
+    """bulk_create без уже существующих строк; число вставленных.
+
+    На SQLite вставленные строки считает total_changes соединения:
+    строки, которые пропустил INSERT OR IGNORE, в него не входят.
+    На других базах считаются все переданные строки.
+    """
+    connection.ensure_connection()
+    changes = getattr(connection.connection, 'total_changes', None)
+    model.objects.bulk_create(objects, ignore_conflicts=True)
+    if changes is None:
+        return len(objects)
+    return connection.connection.total_changes - changes
+
+
+def find_existing(model, keys, fields):
+    """{ключ: pk} строк model, у которых значения fields - один из keys."""
+    lookups = {
+        f'{field}__in': {key[index] for key in keys}
+        for index, field in enumerate(fields)
+    }
+    rows = model.objects.filter(**lookups).values_list(*fields, 'pk')
+    found = {}
+    for *key, pk in rows:
+        if tuple(key) in keys:
+            found[tuple(key)] = pk
+    return found
+
+
+def open_input(path):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+class IdMap:
+    """Отображение username или slug в id, дочитываемое по мере надобности.
+
+    Неизвестные ключи пачки ищутся в базе одним запросом. Размер карты
+    ограничен MAX_SIZE, чтобы память не росла вместе с файлом.
+    """
+    MAX_SIZE = 200000
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.ids = {}
+
+    def load(self, keys):
+        keys = {key for key in keys if key}
+        if len(self.ids) + len(keys) > self.MAX_SIZE:
+            self.ids.clear()
+        missing = keys - self.ids.keys()
+        if missing:
+            self.ids.update(
+                self.model.objects.filter(
+                    **{f'{self.field}__in': missing}
+                ).values_list(self.field, 'pk')
+            )
+
+    def __getitem__(self, key):
+        return self.ids.get(key)
+
+
+class SourceIdMap:
+    """Соответствие id постов выгрузки и id тех же постов в базе.
+
+    Нужно до конца файла, пока идут комментарии, поэтому хранится
+    во временной таблице соединения, а не в памяти.
+    """
+    TABLE = 'import_post_ids'
+    CHUNK_SIZE = 500
+
+    def __init__(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE IF NOT EXISTS {self.TABLE} ('
+                ' source_id INTEGER PRIMARY KEY, post_id INTEGER NOT NULL)'
+            )
+            cursor.execute(f'DELETE FROM {self.TABLE}')
+
+    def add(self, pairs):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.TABLE} (source_id, post_id) '
+                'VALUES (%s, %s)', pairs
+            )
+
+    def get_many(self, source_ids):
+        source_ids = list(set(source_ids))
+        found = {}
+        with connection.cursor() as cursor:
+            for start in range(0, len(source_ids), self.CHUNK_SIZE):
+                chunk = source_ids[start:start + self.CHUNK_SIZE]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(
+                    f'SELECT source_id, post_id FROM {self.TABLE} '
+                    f'WHERE source_id IN ({placeholders})', chunk
+                )
+                found.update(cursor.fetchall())
+        return found
+
+    def close(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.TABLE}')
+
+
+class Command(BaseCommand):
+    help = 'Загружает JSONL, выгруженный export_posts, пачками bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='Файл с выгрузкой (.gz - со сжатием), по умолчанию stdin',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько записей вставлять одним bulk_create',
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс',
+        )
+
+    def handle(self, *args, **options):
+        self.users = IdMap(User, 'username')
+        self.groups = IdMap(Group, 'slug')
+        self.post_ids = SourceIdMap()
+        self.loaded = dict.fromkeys(self.loaders, 0)
+        self.skipped = 0
+        batch_size = options['batch_size']
+        batch_type, batch = None, []
+        source = open_input(options['input'])
+        try:
+            with keep_pub_dates(Post, Comment, Follow):
+                for line_number, line in enumerate(source, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                        record_type = record.pop('type')
+                    except (ValueError, KeyError):
+                        raise CommandError(
+                            f'Строка {line_number}: неверная запись'
+                        )
+                    if record_type not in self.loaders:
+                        raise CommandError(
+                            f'Строка {line_number}: '
+                            f'неизвестный тип {record_type!r}'
+                        )
+                    if batch and (
+                        record_type != batch_type or len(batch) >= batch_size
+                    ):
+                        self.flush(batch_type, batch)
+                        batch = []
+                    batch_type = record_type
+                    batch.append(record)
+                if batch:
+                    self.flush(batch_type, batch)
+        finally:
+            self.post_ids.close()
+            if source is not sys.stdin:
+                source.close()
+        if not options['skip_derived']:
+            self.rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(
+            'Готово: ' + ', '.join(
+                f'{record_type} {count}'
+                for record_type, count in self.loaded.items()
+            ) + f', пропущено {self.skipped}'
+        ))
+
+    def flush(self, record_type, records):
+        # Уже существующие строки пропускаются, поэтому импорт можно
+        # запускать повторно. Пропускаются и записи без автора или
+        # поста в базе.
+        inserted = self.loaders[record_type](self, records)
+        self.loaded[record_type] += inserted
+        self.skipped += len(records) - inserted
+        self.stdout.write(f'{record_type}: {self.loaded[record_type]}')
+
+    def load_groups(self, records):
+        return insert_new(Group, [Group(**record) for record in records])
+
+    def load_users(self, records):
+        password = make_password(None)
+        return insert_new(User, [
+            User(
+                password=password,
+                **{
+                    **record,
+                    'date_joined': parse_datetime(record['date_joined']),
+                },
+            )
+            for record in records
+        ])
+
+    def load_posts(self, records):
+        """Вставляет посты с id из базы и запоминает id из выгрузки.
+
+        id выгрузки могут быть заняты другими постами базы. Уже
+        загруженный пост узнаётся по автору и времени публикации.
+        """
+        self.users.load(record['author__username'] for record in records)
+        self.groups.load(record['group__slug'] for record in records)
+        known = self.post_ids.get_many(record['id'] for record in records)
+        posts = {}
+        for record in records:
+            author_id = self.users[record['author__username']]
+            if not author_id or record['id'] in known:
+                continue
+            pub_date = parse_datetime(record['pub_date'])
+            posts.setdefault((author_id, pub_date), (record['id'], Post(
+                text=record['text'],
+                pub_date=pub_date,
+                image=record['image'],
+                author_id=author_id,
+                group_id=self.groups[record['group__slug']],
+            )))
+        if not posts:
+            return 0
+        fields = ('author_id', 'pub_date')
+        existing = find_existing(Post, posts.keys(), fields)
+        new = [post for key, (_, post) in posts.items() if key not in existing]
+        if new:
+            Post.objects.bulk_create(new)
+            existing = find_existing(Post, posts.keys(), fields)
+        self.post_ids.add([
+            (source_id, existing[key])
+            for key, (source_id, _) in posts.items()
+        ])
+        return len(new)
+
+    def load_comments(self, records):
+        """Вставляет комментарии к постам, загруженным из этой выгрузки."""
+        self.users.load(record['author__username'] for record in records)
+        post_ids = self.post_ids.get_many(
+            record['post_id'] for record in records
+        )
+        comments = {}
+        for record in records:
+            author_id = self.users[record['author__username']]
+            post_id = post_ids.get(record['post_id'])
+            if not author_id or not post_id:
+                continue
+            pub_date = parse_datetime(record['pub_date'])
+            comments.setdefault((post_id, author_id, pub_date), Comment(
+                text=record['text'],
+                pub_date=pub_date,
+                post_id=post_id,
+                author_id=author_id,
+            ))
+        if not comments:
+            return 0
+        existing = find_existing(
+            Comment, comments.keys(), ('post_id', 'author_id', 'pub_date')
+        )
+        new = [
+            comment for key, comment in comments.items()
+            if key not in existing
+        ]
+        Comment.objects.bulk_create(new)
+        return len(new)
+
+    def load_follows(self, records):
+        self.users.load(
+            username for record in records
+            for username in (record['user__username'],
+                             record['author__username'])
+        )
+        return insert_new(Follow, [
+            Follow(
+                pub_date=parse_datetime(record['pub_date']),
+                user_id=self.users[record['user__username']],
+                author_id=self.users[record['author__username']],
+            )
+            for record in records
+            if self.users[record['user__username']]
+            and self.users[record['author__username']]
+        ])
+
+    loaders = {
+        'group': load_groups,
+        'user': load_users,
+        'post': load_posts,
+        'comment': load_comments,
+        'follow': load_follows,
+    }
+
+    def rebuild_derived(self):
+        """Пересчитывает то, что ведут сигналы: bulk_create их не вызывает.
+
+        Всё строится запросами INSERT ... SELECT по целым таблицам,
+        а не по строке на подписку.
+        """
+        self.stdout.write('Пересчёт счётчиков, лент и поискового индекса')
+        with transaction.atomic():
+            counters.rebuild()
+            timeline.rebuild()
+            search.rebuild()
+        # Имена и посты видны во всех лентах: сбрасываем их кеш разом.
+        feed_cache.invalidate(feed_cache.NAMES_SCOPE)
@@ -0,0 +1,124 @@
+import multiprocessing
+import queue
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmarks import load
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает сайт смешанным трафиком из нескольких процессов '
+        'и печатает задержки p50/p95/p99, пропускную способность '
+        'и долю ошибок по каждому endpoint. Запросы на запись '
+        'действительно создают посты, комментарии и подписки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=30)
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='Запросов в секунду на все процессы, 0 - без ограничения',
+        )
+        parser.add_argument(
+            '--mix', nargs='+', default=None,
+            help='Доли запросов вида endpoint=вес, по умолчанию '
+                 + ' '.join(f'{endpoint}={weight}'
+                            for endpoint, weight in load.DEFAULT_MIX.items()),
+        )
+        parser.add_argument(
+            '--users', type=int, default=50,
+            help='Сколько пользователей делают запросы под своим входом',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--database-file', default=None,
+            help='Файл SQLite вместо базы из настроек, например набор, '
+                 'заполненный benchmark_views',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            mix = load.parse_mix(options['mix']) if options['mix'] else (
+                load.DEFAULT_MIX
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['database_file']:
+            settings.DATABASES['default']['NAME'] = options['database_file']
+        targets = load.collect_targets(options['users'])
+        if not targets['posts'] or not targets['readers']:
+            raise CommandError('В базе нет постов или пользователей')
+        if not targets['groups']:
+            mix = {**mix, 'group_posts': 0}
+        worker_options = {
+            'mix': mix,
+            'seconds': options['seconds'],
+            'processes': options['processes'],
+            'rate': options['rate'],
+            'seed': options['seed'],
+            'database_file': options['database_file'],
+        }
+        self.stdout.write(
+            f"Процессов: {options['processes']}, "
+            f"секунд: {options['seconds']}, темп: "
+            f"{options['rate'] or 'без ограничения'}"
+        )
+        collected = self.run_workers(worker_options, targets)
+        self.report(
+            load.merge(result['stats'] for result in collected),
+            max(result['elapsed'] for result in collected),
+        )
+
+    def run_workers(self, options, targets):
+        # spawn: у каждого процесса свои соединения с базой, как у
+        # отдельных процессов WSGI-сервера.
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(options['processes'])
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=load.worker,
+                args=(number, options, targets, barrier, results),
+            )
+            for number in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            collected = [
+                results.get(
+                    timeout=load.BARRIER_TIMEOUT + options['seconds'] * 2
+                )
+                for _ in processes
+            ]
+        except queue.Empty:
+            raise CommandError('Процессы нагрузки не вернули результаты')
+        finally:
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+        return collected
+
+    def report(self, merged, seconds):
+        self.stdout.write(f'Фактическая длительность: {seconds:.1f} с')
+        self.stdout.write(
+            f"{'endpoint':<15} {'запросов':>8} {'в сек':>7} {'p50 мс':>8} "
+            f"{'p95 мс':>8} {'p99 мс':>8} {'ошибок':>7} {'блокир.':>7}"
+        )
+        for endpoint, values in merged.items():
+            self.write_row(endpoint, load.summarize(values, seconds))
+        total = load.merge({'всего': values} for values in merged.values())
+        for name, values in total.items():
+            self.write_row(name, load.summarize(values, seconds))
+
+    def write_row(self, name, summary):
+        self.stdout.write(
+            f"{name:<15} {summary['requests']:>8} {summary['rps']:>7.1f} "
+            f"{summary['p50_ms']:>8.1f} {summary['p95_ms']:>8.1f} "
+            f"{summary['p99_ms']:>8.1f} {summary['error_rate']:>7.1%} "
+            f"{summary['locks']:>7}"
+        )
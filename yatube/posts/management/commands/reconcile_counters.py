@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts import counters
+from posts.models import Comment, Counter, Follow, Group, Post
+
+
+User = get_user_model()
+
+# Тип счётчика: (модель-владелец, считаемая модель, поле связи).
+COUNTER_SOURCES = {
+    counters.AUTHOR_POSTS: (User, Post, 'author_id'),
+    counters.AUTHOR_FOLLOWERS: (User, Follow, 'author_id'),
+    counters.AUTHOR_FOLLOWING: (User, Follow, 'user_id'),
+    counters.GROUP_POSTS: (Group, Post, 'group_id'),
+    counters.POST_COMMENTS: (Post, Comment, 'post_id'),
+}
+
+
+def iterate_id_chunks(model, chunk_size):
+    last_id = 0
+    while True:
+        ids = list(
+            model.objects.filter(pk__gt=last_id).order_by('pk').values_list(
+                'pk', flat=True
+            )[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и сообщает о расхождениях'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Сколько объектов пересчитывать за один проход',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не исправлять',
+        )
+
+    def handle(self, *args, **options):
+        total_drift = 0
+        for kind, (owner, counted, field) in COUNTER_SOURCES.items():
+            checked = drift = 0
+            for ids in iterate_id_chunks(owner, options['chunk_size']):
+                actual = dict(
+                    counted.objects.filter(**{f'{field}__in': ids}).order_by()
+                    .values_list(field).annotate(total=Count('pk'))
+                )
+                stored = counters.get_many(kind, ids)
+                drifted = {
+                    object_id: actual.get(object_id, 0)
+                    for object_id in ids
+                    if actual.get(object_id, 0) != stored[object_id]
+                }
+                checked += len(ids)
+                drift += len(drifted)
+                if drifted and not options['dry_run']:
+                    self.fix(kind, drifted)
+            total_drift += drift
+            self.stdout.write(
+                f'{kind}: проверено {checked}, расхождений {drift}'
+            )
+        if total_drift and options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'Найдено расхождений: {total_drift}, исправления не внесены'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Готово, исправлено расхождений: {total_drift}'
+            ))
+
+    @transaction.atomic
+    def fix(self, kind, drifted):
+        existing = set(
+            Counter.objects.filter(
+                kind=kind, object_id__in=drifted
+            ).values_list('object_id', flat=True)
+        )
+        for object_id in existing:
+            Counter.objects.filter(
+                kind=kind, object_id=object_id
+            ).update(value=drifted[object_id])
+        Counter.objects.bulk_create(
+            [
+                Counter(kind=kind, object_id=object_id, value=value)
+                for object_id, value in drifted.items()
+                if object_id not in existing
+            ],
+            ignore_conflicts=True,
+        )
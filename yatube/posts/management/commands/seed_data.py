@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from posts.benchmarks import seed
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет пустую базу детерминированным синтетическим набором: '
+        'пользователи, группы, посты, комментарии и подписки '
+        'с реалистичными распределениями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--users', type=int, default=None,
+            help='По умолчанию - один пользователь на 50 постов',
+        )
+        parser.add_argument(
+            '--groups', type=int, default=None,
+            help='По умолчанию - одна группа на 2000 постов',
+        )
+        parser.add_argument(
+            '--comments', type=int, default=None,
+            help='По умолчанию - один комментарий на 4 поста',
+        )
+        parser.add_argument(
+            '--image-share', type=float, default=0.1,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Один seed - один и тот же набор данных',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=seed.BATCH_SIZE,
+            help='Сколько строк писать одной транзакцией',
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не строить счётчики, ленты и поисковый индекс',
+        )
+
+    def handle(self, *args, **options):
+        if Post.objects.exists():
+            raise CommandError('seed_data заполняет только пустую базу')
+        if not 0 <= options['image_share'] <= 1:
+            raise CommandError('--image-share должна быть от 0 до 1')
+        shape = {
+            kind: options[kind]
+            for kind in ('users', 'groups', 'comments')
+            if options[kind] is not None
+        }
+        started = time.monotonic()
+        # С DEBUG курсор сохраняет текст каждого запроса, подставляя
+        # в него параметры, и на миллионах строк это дольше вставки.
+        with override_settings(DEBUG=False):
+            seed.seed(
+                options['posts'],
+                seed=options['seed'],
+                image_share=options['image_share'],
+                stdout=self.stdout,
+                shape=shape,
+                batch_size=options['batch_size'],
+                derived=not options['skip_derived'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - started:.0f} с'
+        ))
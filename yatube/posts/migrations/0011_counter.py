@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:48
+
+from django.db import migrations, models
+
+# Тип счётчика: (таблица, поле, по которому считаются строки).
+SQL_SOURCES = {
+    'author_posts': ('posts_post', 'author_id'),
+    'author_followers': ('posts_follow', 'author_id'),
+    'author_following': ('posts_follow', 'user_id'),
+    'group_posts': ('posts_post', 'group_id'),
+    'post_comments': ('posts_comment', 'post_id'),
+}
+
+
+def seed_counters(apps, schema_editor):
+    """Счётчики существующих постов, подписок и комментариев."""
+    with schema_editor.connection.cursor() as cursor:
+        for kind, (table, field) in SQL_SOURCES.items():
+            cursor.execute(
+                'INSERT INTO posts_counter (kind, object_id, value) '
+                f'SELECT %s, {field}, COUNT(*) FROM {table} '
+                f'WHERE {field} IS NOT NULL GROUP BY {field}',
+                [kind],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('author_posts', 'Посты автора'), ('author_followers', 'Подписчики автора'), ('author_following', 'Подписки автора'), ('group_posts', 'Посты группы'), ('post_comments', 'Комментарии поста')], max_length=32, verbose_name='Тип счётчика')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('value', models.IntegerField(default=0, verbose_name='Значение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик',
+                'verbose_name_plural': 'Счётчики',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='counter',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_counter'),
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+import sqlite3
+
+from django.db import migrations
+
+
+def fts5_available(connection):
+    """SQLite с FTS5; иначе индекс не создаётся и поиск идёт по icontains."""
+    if connection.vendor != 'sqlite':
+        return False
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    if not fts5_available(schema_editor.connection):
+        return
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE posts_search USING fts5('
+        'text, kind UNINDEXED, object_id UNINDEXED, post_id UNINDEXED, '
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_search (rowid, text, kind, object_id, post_id) '
+        "SELECT 2 * id, text, 'post', id, id FROM posts_post"
+    )
+    schema_editor.execute(
+        'INSERT INTO posts_search (rowid, text, kind, object_id, post_id) '
+        "SELECT 2 * id + 1, text, 'comment', id, post_id "
+        'FROM posts_comment WHERE post_id IS NOT NULL'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_counter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
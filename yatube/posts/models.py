@@ -1,29 +1,35 @@
+from hashlib import md5
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.db.models.constraints import UniqueConstraint
 
-from core.models import CreatedModel
+from core.models import CreatedModel, UpdatedModel
 
 
 User = get_user_model()
 
 
-class Post(CreatedModel):
+class Post(UpdatedModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст вашего поста'
     )
+    # Отдельные индексы FK не нужны: их покрывают составные индексы
+    # лент из Meta.indexes, где это поле стоит первым.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
-        verbose_name='Автор поста'
+        verbose_name='Автор поста',
+        db_index=False,
     )
     group = models.ForeignKey(
         'Group',
         blank=True,
         null=True,
         on_delete=models.SET_NULL,
+        db_index=False,
         related_name='posts',
         verbose_name='Группа поста',
         help_text='Группа к которой будет относиться пост'
@@ -38,10 +44,32 @@ class Post(CreatedModel):
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            # id в конце: курсорная пагинация сортирует по (pub_date, id).
+            models.Index(fields=['-pub_date', '-id']),
+            models.Index(fields=['author', '-pub_date', '-id']),
+            models.Index(fields=['group', '-pub_date', '-id']),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def cache_version(self):
+        """Версия карточки поста для кеша фрагментов шаблона.
+
+        Меняется вместе с текстом, картинкой, именем автора и группой.
+        """
+        parts = [
+            self.text,
+            self.image.name or '',
+            self.author.get_full_name(),
+            self.author.username,
+        ]
+        if self.group_id:
+            parts += [self.group.slug, self.group.title]
+        return md5('\x00'.join(parts).encode()).hexdigest()
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -51,7 +79,6 @@ class Group(models.Model):
     slug = models.SlugField(
         max_length=200,
         unique=True,
-        db_index=True,
         verbose_name='slug'
     )
     description = models.TextField(verbose_name='Описание группы')
@@ -59,13 +86,8 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
-    class Meta:
-        indexes = [
-            models.Index(fields=['slug'])
-        ]
-
 
-class Comment(CreatedModel):
+class Comment(UpdatedModel):
     text = models.TextField(
         verbose_name='Текст комментария',
         help_text='Текст комментария'
@@ -81,6 +103,7 @@ class Comment(CreatedModel):
         blank=True,
         null=True,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name='comments',
         verbose_name='Пост комментария',
         help_text='Пост к которому относится комментарий'
@@ -90,23 +113,30 @@ class Comment(CreatedModel):
         ordering = ('pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['post', 'pub_date']),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
 
 class Follow(CreatedModel):
+    # Подписки пользователя ищутся по уникальному индексу (user, author),
+    # подписчики автора - по индексу (author, user) из Meta.indexes.
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='follower',
         verbose_name='Кто подписывается',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='following',
-        verbose_name='На кого подписывается'
+        verbose_name='На кого подписывается',
+        db_index=False,
     )
 
     def __str__(self):
@@ -119,3 +149,76 @@ class Follow(CreatedModel):
                 name='unique_followers'
             )
         ]
+        indexes = [
+            models.Index(fields=['author', 'user']),
+        ]
+
+
+class TimelineEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Владелец ленты',
+        db_index=False,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост в ленте',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    def __str__(self):
+        return f'Лента {self.user}: пост {self.post_id}'
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'])
+        ]
+
+
+class Counter(models.Model):
+    AUTHOR_POSTS = 'author_posts'
+    AUTHOR_FOLLOWERS = 'author_followers'
+    AUTHOR_FOLLOWING = 'author_following'
+    GROUP_POSTS = 'group_posts'
+    POST_COMMENTS = 'post_comments'
+    KIND_CHOICES = (
+        (AUTHOR_POSTS, 'Посты автора'),
+        (AUTHOR_FOLLOWERS, 'Подписчики автора'),
+        (AUTHOR_FOLLOWING, 'Подписки автора'),
+        (GROUP_POSTS, 'Посты группы'),
+        (POST_COMMENTS, 'Комментарии поста'),
+    )
+
+    kind = models.CharField(
+        'Тип счётчика',
+        max_length=32,
+        choices=KIND_CHOICES,
+    )
+    object_id = models.PositiveIntegerField('id объекта')
+    value = models.IntegerField('Значение', default=0)
+
+    def __str__(self):
+        return f'{self.kind}[{self.object_id}] = {self.value}'
+
+    class Meta:
+        verbose_name = 'Счётчик'
+        verbose_name_plural = 'Счётчики'
+        constraints = [
+            UniqueConstraint(
+                fields=['kind', 'object_id'],
+                name='unique_counter'
+            )
+        ]
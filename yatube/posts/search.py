@@ -0,0 +1,223 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Индекс - виртуальная таблица SQLite FTS5 posts_search, её создаёт
+миграция 0012. Строки индекса синхронизируют сигналы из signals.py,
+rowid строки выводится из pk: у поста 2 * pk, у комментария 2 * pk + 1,
+поэтому удаление и замена записи не требуют поиска по таблице.
+На базах без FTS5 поиск деградирует до icontains.
+"""
+import collections.abc
+import functools
+import re
+import sqlite3
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+
+TABLE = 'posts_search'
+POST = 'post'
+COMMENT = 'comment'
+SNIPPET_TOKENS = 12
+# Символы из области для частного использования: в тексте их нет,
+# ими snippet() отмечает совпадения до экранирования HTML.
+MARK_OPEN = '\ue000'
+MARK_CLOSE = '\ue001'
+
+WORD_RE = re.compile(r'\w+')
+
+
+@functools.lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    """Собран ли SQLite этого процесса с FTS5.
+
+    Проверяется в отдельной базе в памяти, чтобы не тратить запросы
+    соединения Django.
+    """
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def is_available():
+    return connection.vendor == 'sqlite' and sqlite_has_fts5()
+
+
+def _rowid(kind, object_id):
+    return 2 * object_id + (kind == COMMENT)
+
+
+def build_match(query):
+    """Запрос FTS5 из пользовательской строки.
+
+    Синтаксис FTS5 пользователю не доступен: каждое слово берётся
+    в кавычки и ищется по префиксу, слова объединяются через AND.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_RE.findall(query.lower()))
+
+
+def _replace(kind, object_id, post_id, text):
+    if not is_available():
+        return
+    rowid = _rowid(kind, object_id)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, kind, object_id, post_id) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            [rowid, text, kind, object_id, post_id],
+        )
+
+
+def _remove(kind, object_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [_rowid(kind, object_id)],
+        )
+
+
+def index_post(post):
+    _replace(POST, post.pk, post.pk, post.text)
+
+
+def index_comment(comment):
+    _replace(COMMENT, comment.pk, comment.post_id, comment.text)
+
+
+def remove_post(post_id):
+    _remove(POST, post_id)
+
+
+def remove_comment(comment_id):
+    _remove(COMMENT, comment_id)
+
+
+def rebuild():
+    """Заново заполняет индекс из таблиц постов и комментариев."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, kind, object_id, post_id) '
+            f"SELECT 2 * id, text, '{POST}', id, id FROM posts_post"
+        )
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text, kind, object_id, post_id) '
+            f"SELECT 2 * id + 1, text, '{COMMENT}', id, post_id "
+            'FROM posts_comment WHERE post_id IS NOT NULL'
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+def filter_queryset(queryset, query, kind):
+    """Ограничивает queryset объектами kind, в которых найден query.
+
+    Используется поиском в админке: фильтр остаётся одним запросом,
+    а сортировку и пагинацию делает changelist.
+    """
+    match = build_match(query)
+    if not match:
+        return queryset
+    if not is_available():
+        return queryset.filter(text__icontains=query)
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT object_id FROM {TABLE} '
+        f'WHERE {TABLE} MATCH %s AND kind = %s',
+        [match, kind],
+    ))
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и превращает метки совпадений в <mark>."""
+    html = escape(snippet).replace(MARK_OPEN, '<mark>')
+    return mark_safe(html.replace(MARK_CLOSE, '</mark>'))
+
+
+class SearchResults(collections.abc.Sequence):
+    """Посты по запросу, отсортированные по релевантности bm25.
+
+    Последовательность ленивая: Paginator считает len() одним
+    запросом, а срез загружает только посты своей страницы вместе
+    с фрагментами текста, где нашлось совпадение.
+    """
+
+    def __init__(self, query, posts):
+        self.match = build_match(query)
+        self.query = query
+        self.posts = posts
+        self._count = None
+
+    def __len__(self):
+        if self._count is None:
+            if not self.match:
+                self._count = 0
+            elif not is_available():
+                self._count = self._fallback().count()
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'SELECT COUNT(DISTINCT post_id) FROM {TABLE} '
+                        f'WHERE {TABLE} MATCH %s',
+                        [self.match],
+                    )
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(len(self))
+        if not self.match or start >= stop:
+            return []
+        if not is_available():
+            return list(self._fallback()[start:stop])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, MIN(rank) AS best FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s GROUP BY post_id '
+                'ORDER BY best, post_id DESC LIMIT %s OFFSET %s',
+                [self.match, stop - start, start],
+            )
+            post_ids = [row[0] for row in cursor.fetchall()]
+        posts = self.posts.in_bulk(post_ids)
+        snippets = self._snippets(post_ids)
+        results = []
+        for post_id in post_ids:
+            post = posts.get(post_id)
+            if post is not None:
+                post.search_snippet = snippets.get(post_id)
+                results.append(post)
+        return results
+
+    def _snippets(self, post_ids):
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id, snippet({TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'AND post_id IN ({placeholders}) ORDER BY rank',
+                [MARK_OPEN, MARK_CLOSE, '…', SNIPPET_TOKENS, self.match,
+                 *post_ids],
+            )
+            snippets = {}
+            for post_id, snippet in cursor.fetchall():
+                snippets.setdefault(post_id, highlight(snippet))
+        return snippets
+
+    def _fallback(self):
+        return self.posts.filter(
+            Q(text__icontains=self.query)
+            | Q(comments__text__icontains=self.query)
+        ).distinct()
@@ -0,0 +1,158 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, feed_cache, follow_graph, search, timeline
+from .conditional import touch_post
+from .models import Comment, Follow, Group, Post
+
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    if instance._state.adding:
+        return
+    instance._previous_group_id = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(counters.AUTHOR_POSTS, instance.author_id)
+        if instance.group_id:
+            counters.bump(counters.GROUP_POSTS, instance.group_id)
+        return
+    previous_group_id = getattr(instance, '_previous_group_id', None)
+    if previous_group_id != instance.group_id:
+        if previous_group_id:
+            counters.bump(counters.GROUP_POSTS, previous_group_id, -1)
+        if instance.group_id:
+            counters.bump(counters.GROUP_POSTS, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.bump(counters.AUTHOR_POSTS, instance.author_id, -1)
+    if instance.group_id:
+        counters.bump(counters.GROUP_POSTS, instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created and instance.post_id:
+        counters.bump(counters.POST_COMMENTS, instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    if instance.post_id:
+        counters.bump(counters.POST_COMMENTS, instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(counters.AUTHOR_FOLLOWERS, instance.author_id)
+        counters.bump(counters.AUTHOR_FOLLOWING, instance.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.bump(counters.AUTHOR_FOLLOWERS, instance.author_id, -1)
+    counters.bump(counters.AUTHOR_FOLLOWING, instance.user_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def add_follow_edge(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.followed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow_edge(sender, instance, **kwargs):
+    follow_graph.unfollowed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_timeline(sender, instance, **kwargs):
+    timeline.remove_author(instance.user_id, instance.author_id)
+    timeline.fan_out_if_demoted(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate(*feed_cache.post_feed_scopes(instance))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feeds(sender, instance, **kwargs):
+    feed_cache.invalidate(
+        feed_cache.profile_scope(instance.author.username),
+        feed_cache.profile_scope(instance.user.username),
+        feed_cache.follow_scope(instance.user_id),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_commented_post(sender, instance, **kwargs):
+    if instance.post_id:
+        touch_post(instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feeds(sender, instance, created, **kwargs):
+    if not created:
+        feed_cache.invalidate(
+            feed_cache.NAMES_SCOPE, feed_cache.group_scope(instance.slug)
+        )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, update_fields,
+                            **kwargs):
+    # Вход пользователя сохраняет только last_login, ленты не меняются.
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    feed_cache.invalidate(
+        feed_cache.NAMES_SCOPE, feed_cache.profile_scope(instance.username)
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_saved_comment(sender, instance, **kwargs):
+    if instance.post_id:
+        search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_deleted_comment(sender, instance, **kwargs):
+    search.remove_comment(instance.pk)
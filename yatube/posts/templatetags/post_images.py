@@ -0,0 +1,17 @@
+from django import template
+
+from posts import thumbnails
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(image, geometry):
+    """Готовая миниатюра или оригинал, пока миниатюра создаётся."""
+    if not image:
+        return None
+    prefetched = getattr(image.instance, 'prefetched_thumbnails', {})
+    if geometry in prefetched:
+        return prefetched[geometry] or image
+    return thumbnails.lookup(image, geometry) or image
@@ -0,0 +1,135 @@
+import random
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import counters
+from ..benchmarks import measure, seed
+from ..models import Comment, Counter, Follow, Group, Post, TimelineEntry
+from ..search import SearchResults
+from ..timeline import TIMELINE_MAX_LENGTH
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_data', posts=300, users=40, groups=4, comments=90,
+            image_share=0.5, seed=1, stdout=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_data_builds_requested_shape(self):
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Comment.objects.count(), 90)
+        self.assertEqual(seed.User.objects.count(), 40)
+
+    def test_posts_with_images_point_to_existing_files(self):
+        images = set(Post.objects.exclude(image='').values_list(
+            'image', flat=True
+        ))
+        self.assertTrue(images)
+        for image in images:
+            self.assertTrue(default_storage.exists(image))
+
+    def test_search_index_is_built(self):
+        word = Post.objects.first().text.split()[0]
+        self.assertTrue(len(SearchResults(word, Post.objects.all())))
+
+    def test_seed_data_refuses_non_empty_database(self):
+        with self.assertRaises(CommandError):
+            call_command('seed_data', posts=10, stdout=StringIO())
+
+    def test_seed_builds_derived_data(self):
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(
+            sum(Counter.objects.filter(
+                kind=counters.AUTHOR_POSTS
+            ).values_list('value', flat=True)),
+            300,
+        )
+
+    def test_timelines_are_trimmed(self):
+        for user_id in TimelineEntry.objects.values_list(
+            'user_id', flat=True
+        ).distinct():
+            self.assertLessEqual(
+                TimelineEntry.objects.filter(user_id=user_id).count(),
+                TIMELINE_MAX_LENGTH,
+            )
+
+    def test_run_measures_every_view(self):
+        results = measure.run(repeat=1)
+        self.assertEqual(
+            set(results),
+            {'index', 'index_deep', 'group_posts', 'profile',
+             'post_detail', 'follow_index'},
+        )
+        for metrics in results.values():
+            self.assertGreater(metrics['queries'], 0)
+            self.assertGreater(metrics['total_ms'], 0)
+
+
+class GeneratorTests(SimpleTestCase):
+    def posts(self, number):
+        rng = random.Random(number)
+        return [
+            (post.text, post.author_id, post.group_id, post.pub_date)
+            for post in seed.generate_posts(
+                rng, seed.Dictionary(rng, number), {'posts': 50},
+                [1, 2, 3], [1], weights=seed.popularity_weights(3),
+                images=[], image_share=0,
+            )
+        ]
+
+    def test_same_seed_gives_same_posts(self):
+        self.assertEqual(self.posts(1), self.posts(1))
+        self.assertNotEqual(self.posts(1), self.posts(2))
+
+    def test_follows_are_unique_and_never_self(self):
+        user_ids = list(range(1, 101))
+        follows = [
+            (follow.user_id, follow.author_id)
+            for follow in seed.generate_follows(
+                random.Random(0), user_ids,
+                seed.popularity_weights(len(user_ids)),
+            )
+        ]
+        self.assertEqual(len(follows), len(set(follows)))
+        self.assertFalse([pair for pair in follows if pair[0] == pair[1]])
+
+
+class CompareTests(TestCase):
+    baseline = {'1000': {'index': {'total_ms': 10.0, 'queries': 3}}}
+
+    def test_slowdown_over_threshold_is_regression(self):
+        current = {'1000': {'index': {'total_ms': 14.0, 'queries': 3}}}
+        self.assertEqual(
+            len(measure.compare(self.baseline, current, 1.25)), 1
+        )
+        self.assertEqual(measure.compare(self.baseline, current, 1.5), [])
+
+    def test_more_queries_is_regression(self):
+        current = {'1000': {'index': {'total_ms': 10.0, 'queries': 4}}}
+        self.assertEqual(
+            len(measure.compare(self.baseline, current, 1.25)), 1
+        )
+
+    def test_new_views_and_sizes_are_ignored(self):
+        current = {'5000': {'index': {'total_ms': 50.0, 'queries': 9}}}
+        self.assertEqual(measure.compare(self.baseline, current, 1.25), [])
@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from ..models import Comment, Group, Post
+
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_feeds_answer_not_modified_without_page_queries(self):
+        """Совпавший ETag ленты даёт 304 без запросов и рендера."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=1',
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertTemplateNotUsed(
+                    response, 'posts/includes/post.html'
+                )
+
+    def test_feed_etag_depends_on_page_and_user(self):
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        self.assertNotEqual(
+            etag, self.guest_client.get(url + '?page=2')['ETag']
+        )
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_etag_changes_with_new_post(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        etag = self.guest_client.get(url)['ETag']
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group,
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
+
+    def test_post_detail_not_modified(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.guest_client.get(url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        # Остаётся один запрос за updated_at поста.
+        with self.assertNumQueries(1):
+            not_modified = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(not_modified.status_code, 304)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def login(self, client, user):
+        login_url = reverse('users:login')
+        token = client.get(login_url).context['csrf_token']
+        client.post(login_url, {
+            'username': user.username,
+            'password': 'password',
+            'csrfmiddlewaretoken': token,
+        })
+
+    def test_post_detail_not_modified_after_new_login(self):
+        """После нового входа страница с формой приходит с новым токеном."""
+        reader = User.objects.create_user(
+            username='reader', password='password'
+        )
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.login(client, reader)
+        etag = client.get(url)['ETag']
+        client.get(reverse('users:logout'))
+        self.login(client, reader)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {
+                'text': 'Комментарий',
+                'csrfmiddlewaretoken': response.context['csrf_token'],
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_post_detail_changes_with_comments_and_edits(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        changes = [
+            lambda: Comment.objects.create(
+                text='Комментарий', author=self.author, post=self.post,
+            ),
+            lambda: Comment.objects.filter(post=self.post).delete(),
+            lambda: Post.objects.get(pk=self.post.pk).save(),
+            lambda: Post.objects.create(text='Ещё', author=self.author),
+        ]
+        for change in changes:
+            etag = self.guest_client.get(url)['ETag']
+            change()
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+
+    def test_missing_post_is_not_found(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk + 100]),
+            HTTP_IF_NONE_MATCH='"any"',
+        )
+        self.assertEqual(response.status_code, 404)
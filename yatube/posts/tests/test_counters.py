@@ -0,0 +1,72 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import counters
+from ..models import Comment, Counter, Follow, Group, Post
+
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group2 = Group.objects.create(
+            title='Тестовая группа 2',
+            slug='test-slug2',
+            description='Тестовое описание',
+        )
+
+    def test_counters_follow_writes(self):
+        post = Post.objects.create(
+            text='Тестовый пост', author=self.author, group=self.group
+        )
+        Comment.objects.create(text='Комментарий', author=self.reader,
+                               post=post)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            counters.author_counters(self.author.pk),
+            {'posts': 1, 'followers': 1, 'following': 0}
+        )
+        self.assertEqual(
+            counters.get(counters.AUTHOR_FOLLOWING, self.reader.pk), 1
+        )
+        self.assertEqual(counters.get(counters.GROUP_POSTS, self.group.pk), 1)
+        self.assertEqual(counters.get(counters.POST_COMMENTS, post.pk), 1)
+
+        post.group = self.group2
+        post.save()
+        self.assertEqual(counters.get(counters.GROUP_POSTS, self.group.pk), 0)
+        self.assertEqual(counters.get(counters.GROUP_POSTS, self.group2.pk), 1)
+
+        Follow.objects.filter(user=self.reader).delete()
+        post.delete()
+        self.assertEqual(
+            counters.author_counters(self.author.pk),
+            {'posts': 0, 'followers': 0, 'following': 0}
+        )
+        self.assertEqual(counters.get(counters.GROUP_POSTS, self.group2.pk), 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        Post.objects.create(text='Тестовый пост', author=self.author)
+        Counter.objects.filter(
+            kind=counters.AUTHOR_POSTS, object_id=self.author.pk
+        ).update(value=42)
+        out = StringIO()
+        call_command('reconcile_counters', '--chunk-size=1', stdout=out)
+        self.assertIn(f'{counters.AUTHOR_POSTS}: проверено 2, '
+                      'расхождений 1', out.getvalue())
+        self.assertEqual(
+            counters.get(counters.AUTHOR_POSTS, self.author.pk), 1
+        )
@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.db import routers
+
+from .. import feed_cache
+from ..models import Post
+
+
+User = get_user_model()
+
+
+class FeedInvalidationCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+
+    def test_generation_created_before_commit_is_dropped(self):
+        """Поколение, которое читатель создал до коммита записи,
+        после коммита снова сбрасывается."""
+        scopes = [feed_cache.INDEX_SCOPE]
+        before, = feed_cache.generations(scopes)
+        with transaction.atomic():
+            Post.objects.create(text='Пост', author=self.author)
+            during, = feed_cache.generations(scopes)
+            self.assertNotEqual(during, before)
+        after, = feed_cache.generations(scopes)
+        self.assertNotIn(after, (before, during))
+
+
+class StaleReplicaTests(TransactionTestCase):
+    replica = 'stale_replica'
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        Post.objects.create(text='Старый пост', author=self.author)
+        self.snapshot_replica()
+        patcher = mock.patch.object(
+            routers, 'separate_replicas', return_value=[self.replica]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def snapshot_replica(self):
+        """Реплика - копия основной базы на этот момент, дальнейших
+        записей она не увидит."""
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        connections.databases[self.replica] = {
+            **connections.databases['default'], 'NAME': path,
+        }
+
+        def remove():
+            connections[self.replica].close()
+            delattr(connections._connections, self.replica)
+            del connections.databases[self.replica]
+            os.remove(path)
+        self.addCleanup(remove)
+
+    def index(self):
+        return self.client.get(reverse('posts:index')).content.decode()
+
+    def test_page_cached_after_write_is_built_from_primary(self):
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.assertIn('Новый пост', self.index())
+        # И из кеша отдаётся та же свежая страница.
+        self.assertIn('Новый пост', self.index())
+
+    @override_settings(DATABASE_STICKY_SECONDS=0)
+    def test_replica_builds_pages_after_lag_window(self):
+        Post.objects.create(text='Новый пост', author=self.author)
+        page = self.index()
+        self.assertIn('Старый пост', page)
+        self.assertNotIn('Новый пост', page)
@@ -0,0 +1,93 @@
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import follow_graph
+from ..models import Follow
+
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_following_ids_are_sorted_and_cached(self):
+        for author in reversed(self.authors[:3]):
+            Follow.objects.create(user=self.reader, author=author)
+        cache.clear()
+        expected = sorted(author.pk for author in self.authors[:3])
+        self.assertEqual(
+            follow_graph.following_ids(self.reader.pk).tolist(), expected
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.follows(self.reader.pk, self.authors[0].pk)
+            )
+            self.assertFalse(
+                follow_graph.follows(self.reader.pk, self.authors[4].pk)
+            )
+
+    def test_guest_follows_nobody(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(follow_graph.follows(None, self.authors[0].pk))
+
+    def test_follow_and_unfollow_update_cached_graph(self):
+        author = self.authors[1]
+        self.assertFalse(follow_graph.follows(self.reader.pk, author.pk))
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[author.username])
+        )
+        self.assertTrue(follow_graph.follows(self.reader.pk, author.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.follows(self.reader.pk, author.pk))
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[author.username])
+        )
+        self.assertFalse(follow_graph.follows(self.reader.pk, author.pk))
+
+    def test_profile_shows_whether_viewer_follows(self):
+        """Подписка другого пользователя не делает viewer подписчиком."""
+        author = self.authors[2]
+        Follow.objects.create(user=self.authors[3], author=author)
+        url = reverse('posts:profile', args=[author.username])
+        response = self.reader_client.get(url)
+        self.assertFalse(response.context['following'])
+        Follow.objects.create(user=self.reader, author=author)
+        response = self.reader_client.get(url)
+        self.assertTrue(response.context['following'])
+
+
+class FollowGraphCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+
+    def test_graph_cached_before_commit_is_dropped(self):
+        """Граф, который читатель положил в кеш до коммита подписки,
+        после коммита удаляется."""
+        with transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+            # Кеш заполняет читатель, который ещё видит базу без подписки.
+            cache.set(
+                follow_graph.FOLLOWING_KEY.format(self.reader.pk),
+                array('q').tobytes(),
+            )
+        self.assertTrue(follow_graph.follows(self.reader.pk, self.author.pk))
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -7,6 +8,7 @@ from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from ..models import Group, Post, User, Comment
 from ..forms import PostForm
+from PIL import Image
 
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -147,3 +149,96 @@ class PostCreateFormTests(TestCase):
                 text='Тестовый текст комментария'
             ).exists()
         )
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    POST_IMAGE_MAX_SIZE=(100, 100),
+    POST_IMAGE_MAX_PIXELS=1_000_000,
+)
+class PostImageIngestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def make_upload(self, size, **save_options):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', **save_options)
+        return SimpleUploadedFile(
+            'photo.jpg', buffer.getvalue(), content_type='image/jpeg'
+        )
+
+    def test_large_photo_is_downscaled_without_metadata(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera maker'
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Фото', 'image': self.make_upload(
+                (400, 200), exif=exif.tobytes()
+            )},
+        )
+        post = Post.objects.get(author=self.user)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertEqual(image.format, 'JPEG')
+            self.assertNotIn('exif', image.info)
+
+    def test_too_many_pixels_rejected(self):
+        response = self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Фото', 'image': self.make_upload((2000, 1000))},
+        )
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertIn('image', response.context['form'].errors)
+
+    def test_truncated_image_is_form_error(self):
+        """Данные, битые после заголовка, - ошибка формы, а не 500."""
+        buffer = BytesIO()
+        Image.effect_noise((400, 200), 50).convert('RGB').save(
+            buffer, 'JPEG'
+        )
+        data = buffer.getvalue()
+        # Заголовок цел, и проверку ImageField такой файл проходит.
+        truncated = SimpleUploadedFile(
+            'photo.jpg', data[:len(data) // 2], content_type='image/jpeg'
+        )
+        response = self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Фото', 'image': truncated},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Post.objects.filter(author=self.user).exists())
+        self.assertIn('image', response.context['form'].errors)
+
+    def test_gif_keeps_animation_without_comment(self):
+        frames = [
+            Image.new('RGB', (40, 20), color) for color in ('red', 'blue')
+        ]
+        buffer = BytesIO()
+        frames[0].save(
+            buffer, 'GIF', save_all=True, append_images=frames[1:],
+            duration=[100, 200], loop=0, comment=b'GPS 55.75 37.61',
+        )
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Анимация',
+            'image': SimpleUploadedFile(
+                'clip.gif', buffer.getvalue(), content_type='image/gif'
+            ),
+        })
+        post = Post.objects.get(author=self.user)
+        with open(post.image.path, 'rb') as saved:
+            self.assertNotIn(b'GPS', saved.read())
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'GIF')
+            self.assertEqual(image.n_frames, 2)
+            self.assertNotIn('comment', image.info)
@@ -0,0 +1,82 @@
+import random
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import Client, SimpleTestCase, TestCase
+
+from ..benchmarks import load
+from ..models import Follow, Group, Post
+
+
+User = get_user_model()
+
+
+class MixTests(SimpleTestCase):
+    def test_parse_mix(self):
+        self.assertEqual(
+            load.parse_mix(['index=3', 'post_create=0.5']),
+            {'index': 3, 'post_create': 0.5},
+        )
+
+    def test_parse_mix_rejects_unknown_endpoint_and_bad_weight(self):
+        for items in (['search=1'], ['index=много'], ['index=0']):
+            with self.subTest(items=items):
+                with self.assertRaises(ValueError):
+                    load.parse_mix(items)
+
+
+class OutcomeTests(SimpleTestCase):
+    def call_raising(self, error):
+        with mock.patch.dict(load.REQUESTS, {
+            'index': (mock.Mock(side_effect=error), 200),
+        }):
+            return load.call(None, 'index', None, None)
+
+    def test_locked_database_is_counted_separately(self):
+        self.assertEqual(
+            self.call_raising(OperationalError('database is locked')), 'lock'
+        )
+        self.assertEqual(
+            self.call_raising(OperationalError('no such table')), 'error'
+        )
+        self.assertEqual(self.call_raising(ValueError()), 'error')
+
+    def test_summarize_merged_stats(self):
+        merged = load.merge([
+            {'index': {'latencies': [0.01, 0.02], 'error': 1, 'lock': 0}},
+            {'index': {'latencies': [0.03], 'error': 0, 'lock': 1}},
+        ])
+        summary = load.summarize(merged['index'], seconds=2)
+        self.assertEqual(summary['requests'], 5)
+        self.assertEqual(summary['rps'], 2.5)
+        self.assertEqual(summary['error_rate'], 0.4)
+        self.assertEqual(summary['locks'], 1)
+        self.assertAlmostEqual(summary['p50_ms'], 20)
+
+
+class DriveTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(text='Пост', author=self.author, group=group)
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def test_every_endpoint_answers_as_expected(self):
+        targets = load.collect_targets(users=5)
+        self.assertEqual(targets['readers'], [self.reader.pk])
+        client = Client()
+        client.force_login(self.reader)
+        result = load.drive(random.Random(0), Client(), [client], targets, {
+            'mix': dict.fromkeys(load.REQUESTS, 1),
+            'seconds': 0.5,
+            'processes': 1,
+            'rate': 0,
+        })
+        self.assertEqual(set(result['stats']), set(load.REQUESTS))
+        for endpoint, stats in result['stats'].items():
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual((stats['error'], stats['lock']), (0, 0))
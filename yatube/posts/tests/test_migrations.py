@@ -0,0 +1,95 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Данные создаются историческими моделями до migrate_to,
+    а проверяются после него."""
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes()
+        executor.migrate([self.migrate_from])
+        executor.loader.build_graph()
+        self.setUpBeforeMigration(
+            executor.loader.project_state([self.migrate_from]).apps
+        )
+        executor.migrate([self.migrate_to])
+        executor.loader.build_graph()
+        self.apps = executor.loader.project_state([self.migrate_to]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.latest)
+
+    def setUpBeforeMigration(self, apps):
+        pass
+
+
+@override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=1)
+class TimelineBackfillMigrationTests(MigrationTestCase):
+    migrate_from = ('posts', '0009_follow')
+    migrate_to = ('posts', '0010_timelineentry')
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('auth', 'User')
+        Post = apps.get_model('posts', 'Post')
+        Follow = apps.get_model('posts', 'Follow')
+        reader, other, author, star = [
+            User.objects.create(username=name)
+            for name in ('reader', 'other', 'author', 'star')
+        ]
+        self.reader_id = reader.pk
+        self.post_id = Post.objects.create(text='Пост', author=author).pk
+        Post.objects.create(text='Популярный', author=star)
+        Follow.objects.create(user=reader, author=author)
+        Follow.objects.create(user=reader, author=star)
+        Follow.objects.create(user=other, author=star)
+
+    def test_existing_follows_are_backfilled(self):
+        TimelineEntry = self.apps.get_model('posts', 'TimelineEntry')
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user_id', 'post_id')),
+            [(self.reader_id, self.post_id)],
+        )
+
+
+class CounterSeedMigrationTests(MigrationTestCase):
+    migrate_from = ('posts', '0010_timelineentry')
+    migrate_to = ('posts', '0011_counter')
+
+    def setUpBeforeMigration(self, apps):
+        User = apps.get_model('auth', 'User')
+        Group = apps.get_model('posts', 'Group')
+        Post = apps.get_model('posts', 'Post')
+        Comment = apps.get_model('posts', 'Comment')
+        Follow = apps.get_model('posts', 'Follow')
+        reader = User.objects.create(username='reader')
+        author = User.objects.create(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(text='Пост', author=author, group=group)
+        Post.objects.create(text='Ещё пост', author=author)
+        Comment.objects.create(text='Комментарий', post=post, author=reader)
+        Follow.objects.create(user=reader, author=author)
+        self.expected = {
+            ('author_posts', author.pk): 2,
+            ('author_followers', author.pk): 1,
+            ('author_following', reader.pk): 1,
+            ('group_posts', group.pk): 1,
+            ('post_comments', post.pk): 1,
+        }
+
+    def test_counters_are_seeded(self):
+        Counter = self.apps.get_model('posts', 'Counter')
+        self.assertEqual(
+            {
+                (kind, object_id): value
+                for kind, object_id, value in Counter.objects.values_list(
+                    'kind', 'object_id', 'value'
+                )
+            },
+            self.expected,
+        )
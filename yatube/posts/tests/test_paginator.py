@@ -1,6 +1,8 @@
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
-from ..models import Group, Post, User
+from ..models import Follow, Group, Post, User
+from ..utils import cursor_pagination
 
 
 NUM_TEST_POSTS = 15
@@ -47,3 +49,72 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(name=name):
                 response = self.client.get(name, {'page': 2})
                 self.assertEqual(len(response.context['page_obj']), 5)
+
+
+@override_settings(POSTS_CURSOR_PAGINATION=True)
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.user = User.objects.create_user(username='auth')
+        cls.follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=cls.follower, author=cls.user)
+        for i in range(NUM_TEST_POSTS):
+            Post.objects.create(
+                text='Тестовый текст',
+                author=cls.user,
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.follower)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cursor_pages_walk_whole_feed(self):
+        names = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+        ]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)
+        )
+        for name in names:
+            with self.subTest(name=name):
+                first = self.client.get(name).context['page_obj']
+                self.assertEqual(len(first), 10)
+                self.assertFalse(first.has_previous())
+                second = self.client.get(
+                    name, {'after': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(second), 5)
+                self.assertFalse(second.has_next())
+                self.assertEqual(
+                    [post.pk for post in first] + [post.pk for post in second],
+                    expected
+                )
+                back = self.client.get(
+                    name, {'before': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+
+    def test_cursor_page_skips_count_query(self):
+        with self.assertNumQueries(1):
+            page_obj = cursor_pagination(
+                RequestFactory().get('/'), Post.objects.all()
+            )
+            self.assertEqual(len(page_obj), 10)
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.client.get(reverse('posts:index'), {'after': '!!'})
+        self.assertEqual(len(response.context['page_obj']), 10)
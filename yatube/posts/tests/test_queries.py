@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import assert_query_budget
+
+
+User = get_user_model()
+
+# Бюджет не зависит от числа постов на странице: сессия, пользователь,
+# COUNT пагинатора, один запрос за постами вместе с автором и группой,
+# плюс объект страницы (группа, автор) и его счётчики. Лента подписок
+# сначала проверяет, есть ли в подписках популярные авторы, а после
+# очистки кеша ещё и читает подписки в граф.
+PAGE_QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:follow_index': 6,
+}
+# Сессия, пользователь, валидаторы условного GET, пост со связями,
+# два счётчика и одна порция комментариев вместе с авторами.
+POST_DETAIL_BUDGET = 7
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def create_posts(self, number):
+        for i in range(number):
+            author = User.objects.create_user(
+                username=f'author{Post.objects.count()}',
+                first_name='Имя',
+                last_name='Фамилия',
+            )
+            Follow.objects.create(user=self.reader, author=author)
+            Post.objects.create(text='Тестовый пост', author=author,
+                                group=self.group)
+
+    def urls(self):
+        author = Post.objects.first().author.username
+        return {
+            reverse('posts:index'): PAGE_QUERY_BUDGETS['posts:index'],
+            reverse('posts:group_list', args=[self.group.slug]):
+                PAGE_QUERY_BUDGETS['posts:group_list'],
+            reverse('posts:profile', args=[author]):
+                PAGE_QUERY_BUDGETS['posts:profile'],
+            reverse('posts:follow_index'):
+                PAGE_QUERY_BUDGETS['posts:follow_index'],
+        }
+
+    def test_list_views_stay_within_budget_as_data_grows(self):
+        for number in (1, 15):
+            self.create_posts(number)
+            for url, budget in self.urls().items():
+                with self.subTest(url=url, posts=number):
+                    assert_query_budget(self.client, url, budget)
+
+    def test_post_detail_stays_within_budget_as_comments_grow(self):
+        post = Post.objects.create(text='Тестовый пост', author=self.reader)
+        urls = [
+            reverse('posts:post_detail', args=[post.pk]),
+            reverse('posts:post_comments', args=[post.pk]),
+        ]
+        for number in (1, 30):
+            for i in range(number):
+                author = User.objects.create_user(
+                    username=f'commenter{Comment.objects.count()}'
+                )
+                Comment.objects.create(text='Комментарий', author=author,
+                                       post=post)
+            for url in urls:
+                with self.subTest(url=url, comments=number):
+                    assert_query_budget(self.client, url, POST_DETAIL_BUDGET)
@@ -0,0 +1,109 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..utils import encode_cursor
+
+
+User = get_user_model()
+
+# Строки EXPLAIN QUERY PLAN, недопустимые для запросов лент: полный
+# проход по таблице без индекса и сортировка во временном B-дереве.
+FULL_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+TEMP_SORT_RE = re.compile(
+    r'USE TEMP B-TREE FOR (RIGHT PART OF |LAST TERM OF )?(ORDER|GROUP) BY'
+)
+# Крошечные служебные таблицы, которые читаются по ключу или целиком.
+IGNORED_TABLES = {'django_session', 'django_content_type', 'CONSTANT'}
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def bad_plan_lines(plan):
+    problems = []
+    for line in plan:
+        scan = FULL_SCAN_RE.match(line)
+        if scan and scan.group(1) not in IGNORED_TABLES:
+            problems.append(line)
+        elif TEMP_SORT_RE.search(line):
+            problems.append(line)
+    return problems
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(3)
+        ]
+        cls.post = posts[0]
+        cls.middle = posts[1]
+        Comment.objects.create(
+            text='Комментарий', author=cls.reader, post=cls.post
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def assert_plans_use_indexes(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        failures = []
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            plan = query_plan(sql)
+            problems = bad_plan_lines(plan)
+            if problems:
+                failures.append(f'{sql}\n  ' + '\n  '.join(plan))
+        self.assertFalse(
+            failures,
+            f'{url}: запросы без индекса\n' + '\n'.join(failures),
+        )
+
+    def feed_urls(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        ]
+
+    def test_feed_queries_use_indexes(self):
+        for url in self.feed_urls():
+            with self.subTest(url=url):
+                self.assert_plans_use_indexes(url)
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_feed_queries_use_indexes(self):
+        cursor = encode_cursor(self.middle)
+        for url in self.feed_urls():
+            for query in ('', f'?after={cursor}', f'?before={cursor}'):
+                with self.subTest(url=url + query):
+                    self.assert_plans_use_indexes(url + query)
@@ -0,0 +1,105 @@
+import sqlite3
+from importlib import import_module
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Путешествие по горам Кавказа', author=cls.author
+        )
+        cls.other = Post.objects.create(
+            text='Рецепт борща', author=cls.author
+        )
+        Comment.objects.create(
+            text='Лучше всего ехать в горы летом', author=cls.author,
+            post=cls.other,
+        )
+
+    def search_ids(self, query):
+        return [post.pk for post in search.SearchResults(
+            query, Post.objects.all()
+        )]
+
+    def test_ranked_results_from_posts_and_comments(self):
+        self.assertEqual(self.search_ids('горы')[0], self.other.pk)
+        self.assertCountEqual(
+            self.search_ids('гор'), [self.post.pk, self.other.pk]
+        )
+        self.assertEqual(self.search_ids('борщ'), [self.other.pk])
+
+    def test_index_follows_writes(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Прогулка по морю'
+        post.save()
+        self.assertEqual(self.search_ids('кавказ'), [])
+        self.assertEqual(self.search_ids('морю'), [self.post.pk])
+        Post.objects.get(pk=self.other.pk).delete()
+        self.assertEqual(self.search_ids('горы'), [])
+
+    def test_query_syntax_is_not_exposed(self):
+        self.assertEqual(self.search_ids('борща" OR NEAR('), [])
+        self.assertEqual(self.search_ids('***'), [])
+
+    def test_falls_back_to_icontains_without_fts5(self):
+        with mock.patch.object(search, 'sqlite_has_fts5', return_value=False):
+            self.assertFalse(search.is_available())
+            self.assertEqual(self.search_ids('борщ'), [self.other.pk])
+
+    def test_migration_skips_index_without_fts5(self):
+        migration = import_module('posts.migrations.0012_search_index')
+        schema_editor = mock.Mock(connection=connection)
+        probe = mock.Mock()
+        probe.execute.side_effect = sqlite3.OperationalError(
+            'no such module: fts5'
+        )
+        fake_sqlite3 = mock.Mock(
+            connect=mock.Mock(return_value=probe),
+            OperationalError=sqlite3.OperationalError,
+        )
+        with mock.patch.object(migration, 'sqlite3', fake_sqlite3):
+            migration.create_search_index(None, schema_editor)
+        schema_editor.execute.assert_not_called()
+
+    def test_rebuild_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM posts_search')
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.search_ids('борщ'), [self.other.pk])
+
+    def test_search_view_escapes_snippet(self):
+        Post.objects.create(
+            text='<script>alert(1)</script> опасный текст', author=self.author
+        )
+        response = self.client.get(reverse('posts:search'), {'q': 'опасный'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        snippet = response.context['page_obj'][0].search_snippet
+        self.assertIn('<mark>опасный</mark>', snippet)
+        self.assertNotIn('<script>', snippet)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кавказа'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post]
+        )
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import tasks
+
+from .. import thumbnails
+from ..models import Post
+from .utils import assert_query_budget
+
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='photo.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (100, 60), color=(200, 0, 0)).save(buffer, 'png')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        thumbnails._memo.clear()
+        self.post = Post.objects.create(
+            text='Пост с картинкой', author=self.user, image=make_image()
+        )
+
+    def test_page_shows_original_until_thumbnail_is_ready(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.image.url)
+        thumbnails.generate_thumbnails(self.post.pk)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, self.post.image.url)
+        ready = thumbnails.lookup(self.post.image, '960x339')
+        self.assertContains(response, ready.url)
+
+    def test_post_create_enqueues_thumbnails(self):
+        client = Client()
+        client.force_login(self.user)
+        client.post(reverse('posts:post_create'), {
+            'text': 'Новый пост', 'image': make_image('new.png')
+        })
+        post = Post.objects.get(text='Новый пост')
+        for geometry in thumbnails.THUMBNAIL_SIZES:
+            self.assertIsNone(thumbnails.lookup(post.image, geometry))
+        tasks.work(once=True)
+        for geometry in thumbnails.THUMBNAIL_SIZES:
+            self.assertIsNotNone(thumbnails.lookup(post.image, geometry))
+
+    def test_generate_thumbnails_command_backfills(self):
+        out = StringIO()
+        call_command('generate_thumbnails', '--workers=0', stdout=out)
+        self.assertIn('обработано постов: 1', out.getvalue())
+        self.assertIsNotNone(thumbnails.lookup(self.post.image, '700x339'))
+
+    def test_prefetch_resolves_page_in_one_lookup(self):
+        posts = [self.post] + [
+            Post.objects.create(text=f'Пост {i}', author=self.user,
+                                image=make_image(f'photo{i}.png'))
+            for i in range(4)
+        ]
+        thumbnails.generate_thumbnails(posts[1].pk)
+        cache.clear()
+        thumbnails._memo.clear()
+        with self.assertNumQueries(1):
+            thumbnails.prefetch(posts, thumbnails.FEED_THUMBNAIL)
+        self.assertIsNotNone(
+            posts[1].prefetched_thumbnails[thumbnails.FEED_THUMBNAIL]
+        )
+        self.assertIsNone(
+            posts[0].prefetched_thumbnails[thumbnails.FEED_THUMBNAIL]
+        )
+        with self.assertNumQueries(0):
+            thumbnails.prefetch(posts[1:2], thumbnails.FEED_THUMBNAIL)
+
+    def test_index_thumbnail_queries_do_not_grow_with_page(self):
+        for i in range(9):
+            Post.objects.create(text=f'Пост {i}', author=self.user,
+                                image=make_image(f'photo{i}.png'))
+        thumbnails._memo.clear()
+        # Четыре запроса страницы и один пакетный запрос миниатюр.
+        assert_query_budget(self.client, reverse('posts:index'), 5)
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import timeline
+from ..models import Follow, Post, TimelineEntry
+
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+
+    def test_timeline_is_capped(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with mock.patch.object(timeline, 'TIMELINE_MAX_LENGTH', 3):
+            posts = [
+                Post.objects.create(text=f'Пост {i}', author=self.author)
+                for i in range(5)
+            ]
+        kept = TimelineEntry.objects.filter(user=self.reader)
+        self.assertEqual(kept.count(), 3)
+        self.assertNotIn(posts[0].pk, kept.values_list('post', flat=True))
+
+    def test_popular_author_is_pulled_not_fanned_out(self):
+        another = User.objects.create_user(username='another')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=another, author=self.author)
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 1):
+            post = Post.objects.create(text='Популярный', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            posts, cursor_keys = timeline.timeline_feed(self.reader)
+        self.assertIn(post, posts)
+        self.assertEqual(cursor_keys, timeline.POST_CURSOR_KEYS)
+
+    def test_demoted_author_posts_are_fanned_out(self):
+        """Посты и подписки времён популярности попадают в ленты,
+        когда автор опускается до порога."""
+        another = User.objects.create_user(username='another')
+        with mock.patch.object(timeline, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 1):
+            Follow.objects.create(user=another, author=self.author)
+            Follow.objects.create(user=self.reader, author=self.author)
+            post = Post.objects.create(text='Популярный', author=self.author)
+            self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+            Follow.objects.get(user=another).delete()
+            self.assertTrue(
+                TimelineEntry.objects.filter(
+                    user=self.reader, post=post
+                ).exists()
+            )
+            posts, cursor_keys = timeline.timeline_feed(self.reader)
+        self.assertIn(post, posts)
+        self.assertEqual(cursor_keys, timeline.ENTRY_CURSOR_KEYS)
+
+    def test_rebuild_matches_fan_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild()
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('user', 'post')),
+            [(self.reader.pk, post.pk)],
+        )
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import counters
+from ..models import Comment, Follow, Group, Post
+from ..search import SearchResults
+
+
+User = get_user_model()
+
+
+class ExportImportTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев'
+        )
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            text='Старый пост про горы', author=self.author, group=self.group
+        )
+        self.pub_date = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        Post.objects.filter(pk=self.post.pk).update(pub_date=self.pub_date)
+        Comment.objects.create(
+            text='Комментарий', author=self.reader, post=self.post
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl.gz')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertFalse(Post.objects.exists())
+
+        call_command('import_posts', self.path, batch_size=1,
+                     stdout=StringIO())
+
+        post = Post.objects.get()
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(post.author.first_name, 'Лев')
+        self.assertEqual(post.group.slug, 'test-slug')
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(post.comments.get().author.username, 'reader')
+        reader = User.objects.get(username='reader')
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=post.author).exists()
+        )
+        self.assertEqual(
+            counters.get(counters.POST_COMMENTS, post.pk), 1
+        )
+        self.assertEqual(list(reader.timeline.values_list(
+            'post_id', flat=True
+        )), [post.pk])
+        self.assertEqual(
+            [found.pk for found in SearchResults('горы', Post.objects)],
+            [post.pk],
+        )
+
+    def test_import_is_idempotent(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+        out = StringIO()
+        call_command('import_posts', self.path, stdout=out)
+        self.assertIn('пропущено 6', out.getvalue())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_source_ids_taken_by_local_posts(self):
+        """Пост с занятым id загружается под новым, и комментарии
+        попадают к нему, а не к локальному посту с тем же id."""
+        call_command('export_posts', self.path, stderr=StringIO())
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        local = Post.objects.create(
+            id=self.post.pk, text='Местный пост',
+            author=User.objects.create_user(username='local'),
+        )
+
+        out = StringIO()
+        call_command('import_posts', self.path, stdout=out)
+
+        self.assertIn('post 1', out.getvalue())
+        self.assertIn('comment 1', out.getvalue())
+        self.assertIn('пропущено 0', out.getvalue())
+        imported = Post.objects.exclude(pk=local.pk).get()
+        self.assertEqual(imported.text, 'Старый пост про горы')
+        self.assertEqual(imported.comments.get().text, 'Комментарий')
+        self.assertFalse(local.comments.exists())
@@ -9,7 +9,8 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 
-from ..models import Group, Post, Follow
+from ..models import Comment, Group, Post, Follow
+from ..utils import COMMENTS_PER_PAGE
 
 
 User = get_user_model()
@@ -205,10 +206,54 @@ class PostViewTests(TestCase):
         comment_context = response.context.get('comments')[0]
         self.assertIn(comment_context, self.post.comments.all())
 
+    def test_post_comments_fragment_continues_by_cursor(self):
+        authors = [
+            User.objects.create_user(username=f'commenter{number}')
+            for number in range(COMMENTS_PER_PAGE + 5)
+        ]
+        comments = [
+            Comment.objects.create(text=f'Комментарий {number}',
+                                   author=author, post=self.post)
+            for number, author in enumerate(authors)
+        ]
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        first_page = response.context['comments']
+        self.assertEqual(list(first_page), comments[:COMMENTS_PER_PAGE])
+        self.assertTrue(first_page.has_next())
+        fragment_url = reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.id}
+        )
+        self.assertContains(response, fragment_url)
+        response = self.guest_client.get(
+            fragment_url, {'after': first_page.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            list(response.context['comments']),
+            comments[COMMENTS_PER_PAGE:],
+        )
+        self.assertFalse(response.context['comments'].has_next())
+        self.assertContains(response, authors[-1].username)
+
+    def test_post_comments_fragment_of_missing_post(self):
+        response = self.guest_client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
     def test_index_cache(self):
         index_url = reverse('posts:index')
         response = self.authorized_client.get(index_url)
         content_response = response.content
+        # bulk_create не шлёт сигналов, поэтому кеш не сбрасывается
+        Post.objects.bulk_create(
+            [Post(text='Тестовый текст мимо сигналов', author=self.user)]
+        )
+        cache_response = self.authorized_client.get(index_url)
+        self.assertEqual(content_response, cache_response.content)
         # Создаём пост
         self.authorized_client.post(
             reverse('posts:post_create'),
@@ -220,13 +265,26 @@ class PostViewTests(TestCase):
                 text='Тестовый текст cache',
             ).exists()
         )
-        cache_response = self.authorized_client.get(index_url)
-        cache_response_content = cache_response.content
-        self.assertEqual(content_response, cache_response_content)
-        cache.clear()
-        no_cache_response = self.authorized_client.get(index_url)
-        no_cache_response_content = no_cache_response.content
-        self.assertNotEqual(content_response, no_cache_response_content)
+        fresh_response = self.authorized_client.get(index_url)
+        self.assertNotEqual(content_response, fresh_response.content)
+        self.assertContains(fresh_response, 'Тестовый текст cache')
+
+    def test_feed_cache_invalidated_by_follow(self):
+        profile_url = reverse(
+            'posts:profile', kwargs={'username': self.user.username}
+        )
+        follow_url = reverse('posts:follow_index')
+        self.second_authorized_client.get(profile_url)
+        response = self.second_authorized_client.get(follow_url)
+        self.assertNotContains(response, self.post.text)
+        self.second_authorized_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.user.username})
+        )
+        response = self.second_authorized_client.get(follow_url)
+        self.assertContains(response, self.post.text)
+        response = self.second_authorized_client.get(profile_url)
+        self.assertTrue(response.context['following'])
 
     def test_auth_user_follow(self):
         self.second_authorized_client.get(reverse(
@@ -265,3 +323,23 @@ class PostViewTests(TestCase):
         self.assertQuerysetEqual(
             response.context.get('page_obj').object_list, []
         )
+
+    def test_post_card_cache_follows_author_and_group_changes(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        self.guest_client.get(url)
+        author = User.objects.get(pk=self.user.pk)
+        author.first_name = 'Новое'
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название группы'
+        group.save()
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Автор: Новое')
+        self.assertContains(response, 'Группа: Новое название группы')
+
+    def test_post_card_cache_keeps_edit_link_per_viewer(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.id})
+        self.assertNotContains(self.second_authorized_client.get(url),
+                               edit_url)
+        self.assertContains(self.authorized_client.get(url), edit_url)
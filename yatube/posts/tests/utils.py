@@ -0,0 +1,24 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_query_budget(client, url, budget, data=None):
+    """Проверяет, что страница укладывается в budget SQL-запросов.
+
+    Кеш очищается перед запросом, чтобы измерялся полный путь view.
+    Возвращает ответ, чтобы тест мог проверить его содержимое.
+    """
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, data or {})
+    executed = len(context.captured_queries)
+    if executed > budget:
+        queries = '\n'.join(
+            f'{number}. {query["sql"]}'
+            for number, query in enumerate(context.captured_queries, 1)
+        )
+        raise AssertionError(
+            f'{url}: {executed} запросов при бюджете {budget}\n{queries}'
+        )
+    return response
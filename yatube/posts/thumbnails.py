@@ -0,0 +1,211 @@
+"""Миниатюры картинок постов, которые создаются вне запроса.
+
+post_create и post_edit ставят создание всех размеров в очередь
+задач core.tasks, а шаблоны только ищут готовую миниатюру в key-value
+хранилище sorl и, пока её нет, показывают оригинал.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from core import timing
+from core.tasks import task
+
+
+FEED_THUMBNAIL = '960x339'
+DETAIL_THUMBNAIL = '700x339'
+# Все размеры, которые используют шаблоны постов.
+THUMBNAIL_SIZES = {
+    FEED_THUMBNAIL: {'crop': 'center', 'upscale': True},
+    DETAIL_THUMBNAIL: {'crop': 'center', 'upscale': True},
+}
+# Готовые миниатюры не меняются, поэтому их можно помнить в процессе.
+MEMO_MAX_SIZE = 10000
+_memo = {}
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """ImageFile миниатюры с тем же именем, что даст get_thumbnail."""
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def lookup(self, file_, geometry_string, **options):
+        """Готовая миниатюра из key-value хранилища или None."""
+        thumbnail = self.thumbnail_file(file_, geometry_string, **options)
+        return default.kvstore.get(thumbnail)
+
+    def lookup_many(self, files, geometry_string, **options):
+        """Готовые миниатюры для набора картинок одним обращением.
+
+        Для хранилища cached_db сначала одним get_many читается кеш,
+        затем одним запросом - таблица sorl. Промахи кешируются так же,
+        как это делает сам sorl.
+        """
+        # Модели sorl нельзя импортировать до django.setup() в пуле.
+        from sorl.thumbnail.kvstores.cached_db_kvstore import (
+            EMPTY_VALUE, KVStore as CachedDbKVStore,
+        )
+        from sorl.thumbnail.models import KVStore as KVStoreModel
+
+        thumbnails = {
+            file_: self.thumbnail_file(file_, geometry_string, **options)
+            for file_ in files
+        }
+        kvstore = default.kvstore
+        if not isinstance(kvstore, CachedDbKVStore):
+            return {
+                file_: kvstore.get(thumbnail)
+                for file_, thumbnail in thumbnails.items()
+            }
+        raw_keys = {
+            file_: add_prefix(thumbnail.key)
+            for file_, thumbnail in thumbnails.items()
+        }
+        values = kvstore.cache.get_many(list(raw_keys.values()))
+        missing = [key for key in raw_keys.values() if key not in values]
+        if missing:
+            found = dict(
+                KVStoreModel.objects.filter(key__in=missing).values_list(
+                    'key', 'value'
+                )
+            )
+            fetched = {key: found.get(key, EMPTY_VALUE) for key in missing}
+            kvstore.cache.set_many(
+                fetched, sorl_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            values.update(fetched)
+        return {
+            file_: (
+                None if values[key] == EMPTY_VALUE
+                else deserialize_image_file(values[key])
+            )
+            for file_, key in raw_keys.items()
+        }
+
+
+backend = PostThumbnailBackend()
+
+
+def _remember(image_name, geometry, thumbnail):
+    if len(_memo) >= MEMO_MAX_SIZE:
+        _memo.clear()
+    _memo[image_name, geometry] = thumbnail
+
+
+@timing.span('thumbnails')
+def lookup(image, geometry):
+    """Готовая миниатюра картинки или None, без обращения к storage."""
+    thumbnail = _memo.get((image.name, geometry))
+    if thumbnail is None:
+        thumbnail = backend.lookup(
+            image, geometry, **THUMBNAIL_SIZES[geometry]
+        )
+        if thumbnail is not None:
+            _remember(image.name, geometry, thumbnail)
+    return thumbnail
+
+
+@timing.span('thumbnails')
+def prefetch(posts, geometry):
+    """Находит миниатюры для всех постов страницы одним пакетом.
+
+    Результат сохраняется в post.prefetched_thumbnails, его читает тег
+    post_thumbnail, поэтому при рендере хранилище уже не опрашивается.
+    """
+    posts = [post for post in posts if post.image]
+    names = {post.image.name for post in posts}
+    found = {
+        name: _memo[name, geometry]
+        for name in names if (name, geometry) in _memo
+    }
+    missing = [name for name in names if name not in found]
+    if missing:
+        looked_up = backend.lookup_many(
+            missing, geometry, **THUMBNAIL_SIZES[geometry]
+        )
+        for name, thumbnail in looked_up.items():
+            if thumbnail is not None:
+                _remember(name, geometry, thumbnail)
+        found.update(looked_up)
+    for post in posts:
+        prefetched = getattr(post, 'prefetched_thumbnails', {})
+        prefetched[geometry] = found[post.image.name]
+        post.prefetched_thumbnails = prefetched
+
+
+@task()
+def generate_thumbnails(post_id, invalidate=True):
+    """Создаёт все размеры миниатюр для картинки поста.
+
+    После этого сбрасывает кеш лент и валидаторы страницы поста, где
+    страницы с оригиналом вместо миниатюры могли бы жить ещё долго.
+    """
+    # Модуль импортируется в дочернем процессе до django.setup(),
+    # поэтому модели подключаются только здесь.
+    from .conditional import touch_post
+    from .feed_cache import invalidate as invalidate_feeds, post_feed_scopes
+    from .models import Post
+
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None or not post.image:
+        return post_id
+    for geometry, options in THUMBNAIL_SIZES.items():
+        backend.get_thumbnail(post.image.name, geometry, **options)
+    if invalidate:
+        invalidate_feeds(*post_feed_scopes(post))
+        touch_post(post_id)
+    return post_id
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+_executor = None
+
+
+def get_executor(workers=None):
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=workers or settings.POST_THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+        )
+    return _executor
+
+
+def reset_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = None
+
+
+def enqueue(post):
+    """Ставит создание миниатюр поста в очередь задач."""
+    if post.image:
+        generate_thumbnails.enqueue(
+            post.pk, dedup_key=f'thumbnails:{post.pk}'
+        )
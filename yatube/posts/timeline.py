@@ -0,0 +1,207 @@
+"""Материализованные ленты подписок (fan-out on write).
+
+Новый пост раскладывается в ленты подписчиков автора. Посты популярных
+авторов (больше TIMELINE_FANOUT_MAX_FOLLOWERS подписчиков) не
+раскладываются, а подмешиваются в ленту при чтении. Популярность
+везде считается по счётчику подписчиков в таблице Counter. Когда
+автор после отписки перестаёт быть популярным, его недавние посты
+раскладываются по лентам всех подписчиков: пока он был популярен,
+ни новые посты, ни новые подписки в ленты не попадали.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Q
+
+from . import counters, follow_graph
+from .models import Counter, Follow, Post, TimelineEntry
+
+
+TIMELINE_MAX_LENGTH = getattr(settings, 'TIMELINE_MAX_LENGTH', 1000)
+TIMELINE_FANOUT_MAX_FOLLOWERS = getattr(
+    settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 1000
+)
+# Сколько id подписок передавать в один запрос IN.
+IN_CHUNK_SIZE = 500
+
+
+def is_popular(author_id) -> bool:
+    """Автор слишком популярен для раскладки по лентам."""
+    followers = counters.get(counters.AUTHOR_FOLLOWERS, author_id)
+    return followers > TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+def popular_authors(user_id) -> list:
+    """id популярных авторов из подписок пользователя.
+
+    Подписки берутся из графа в кеше, а не подзапросом к Follow.
+    """
+    following = follow_graph.following_ids(user_id)
+    popular = []
+    for start in range(0, len(following), IN_CHUNK_SIZE):
+        popular += Counter.objects.filter(
+            kind=counters.AUTHOR_FOLLOWERS,
+            object_id__in=following[start:start + IN_CHUNK_SIZE].tolist(),
+            value__gt=TIMELINE_FANOUT_MAX_FOLLOWERS,
+        ).values_list('object_id', flat=True)
+    return popular
+
+
+def trim_timelines(user_ids):
+    """Обрезает переполненные ленты до TIMELINE_MAX_LENGTH записей."""
+    overfull = TimelineEntry.objects.filter(
+        user_id__in=user_ids
+    ).order_by().values('user_id').annotate(
+        entries=Count('id')
+    ).filter(
+        entries__gt=TIMELINE_MAX_LENGTH
+    ).values_list('user_id', flat=True)
+    for user_id in list(overfull):
+        stale = TimelineEntry.objects.filter(user_id=user_id).order_by(
+            '-pub_date', '-post_id'
+        ).values_list('pk', flat=True)[TIMELINE_MAX_LENGTH:]
+        TimelineEntry.objects.filter(pk__in=list(stale)).delete()
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    if is_popular(post.author_id):
+        return
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True
+        )
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines(follower_ids)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту недавние посты автора после подписки."""
+    if is_popular(author_id):
+        return
+    recent = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date'
+    ).values_list('pk', 'pub_date')[:TIMELINE_MAX_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in recent
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines([user_id])
+
+
+def remove_author(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def fan_out_if_demoted(author_id):
+    """Раскладывает посты автора, который после отписки стал
+    непопулярным, по лентам всех его подписчиков.
+
+    Вызывается после уменьшения счётчика, поэтому переход через порог
+    видит ровно одна отписка.
+    """
+    followers = counters.get(counters.AUTHOR_FOLLOWERS, author_id)
+    if followers != TIMELINE_FANOUT_MAX_FOLLOWERS:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO posts_timelineentry (user_id, post_id, pub_date) '
+            'SELECT follow.user_id, post.id, post.pub_date '
+            'FROM posts_follow AS follow CROSS JOIN ('
+            '  SELECT id, pub_date FROM posts_post WHERE author_id = %s'
+            '  ORDER BY pub_date DESC LIMIT %s'
+            ') AS post '
+            'WHERE follow.author_id = %s AND NOT EXISTS ('
+            '  SELECT 1 FROM posts_timelineentry AS entry'
+            '  WHERE entry.user_id = follow.user_id'
+            '  AND entry.post_id = post.id)',
+            [author_id, TIMELINE_MAX_LENGTH, author_id],
+        )
+    trim_timelines(list(
+        Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        )
+    ))
+
+
+# Все ленты одним INSERT ... SELECT; им же заполняет ленты миграция
+# 0010, поэтому запрос не использует ни счётчики, ни MATERIALIZED
+# (SQLite 3.35+). В ленту попадут не больше max_length свежих постов
+# каждого автора, поэтому сначала они отбираются по индексу
+# (author, -pub_date, -id) и только потом соединяются с подписками:
+# у популярных авторов постов больше, чем поместится в ленту.
+# Популярность считается по подпискам, из них же строятся счётчики.
+REBUILD_SQL = (
+    'WITH recent AS ('
+    '  SELECT author_id, id, pub_date FROM ('
+    '    SELECT author_id, id, pub_date, ROW_NUMBER() OVER ('
+    '      PARTITION BY author_id ORDER BY pub_date DESC'
+    '    ) AS position FROM posts_post'
+    '  ) AS ranked_posts WHERE position <= %s'
+    ') '
+    'INSERT INTO posts_timelineentry (user_id, post_id, pub_date) '
+    'SELECT user_id, post_id, pub_date FROM ('
+    '  SELECT follow.user_id, post.id AS post_id, post.pub_date,'
+    '    ROW_NUMBER() OVER ('
+    '      PARTITION BY follow.user_id ORDER BY post.pub_date DESC'
+    '    ) AS position'
+    '  FROM posts_follow AS follow'
+    '  JOIN recent AS post ON post.author_id = follow.author_id'
+    '  WHERE follow.author_id NOT IN ('
+    '    SELECT author_id FROM posts_follow'
+    '    GROUP BY author_id HAVING COUNT(*) > %s)'
+    ') AS ranked_entries WHERE position <= %s'
+)
+
+
+def fill_timelines(cursor, max_length, max_followers):
+    """Заполняет пустую таблицу лент запросом REBUILD_SQL."""
+    cursor.execute(REBUILD_SQL, [max_length, max_followers, max_length])
+
+
+def rebuild():
+    """Строит все ленты заново по подпискам и постам."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM posts_timelineentry')
+        fill_timelines(
+            cursor, TIMELINE_MAX_LENGTH, TIMELINE_FANOUT_MAX_FOLLOWERS
+        )
+
+
+# Ключ курсора ленты без популярных авторов: колонки записи ленты,
+# они идут в индексе (user, -pub_date, -post).
+ENTRY_CURSOR_KEYS = (
+    'timeline_entries__pub_date', 'timeline_entries__post_id',
+)
+POST_CURSOR_KEYS = ('pub_date', 'pk')
+
+
+def timeline_feed(user):
+    """Лента подписок и поля ключа её курсорной пагинации.
+
+    Без популярных авторов в подписках лента читается соединением
+    с записями ленты по индексу (user, -pub_date, -post), без сортировки
+    всех постов. Иначе посты популярных авторов подмешиваются через OR.
+    """
+    popular = popular_authors(user.pk)
+    if not popular:
+        posts = Post.objects.filter(timeline_entries__user=user).order_by(
+            *(F(key).desc() for key in ENTRY_CURSOR_KEYS)
+        )
+        return posts, ENTRY_CURSOR_KEYS
+    posts = Post.objects.filter(
+        Q(pk__in=user.timeline.values('post')) | Q(author__in=popular)
+    )
+    return posts, POST_CURSOR_KEYS
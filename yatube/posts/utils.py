@@ -1,14 +1,167 @@
+import base64
+import collections.abc
+
+from django.conf import settings
 from django.core.paginator import Page, Paginator
+from django.db.models import F, Q
 from django.db.models.query import QuerySet
 from django.core.handlers.wsgi import WSGIRequest
+from django.utils.dateparse import parse_datetime
 
 
 CONST_SHOWED_POST = 10
+COMMENTS_PER_PAGE = 20
+# Сколько ссылок на страницы показывать по обе стороны от текущей.
+PAGE_WINDOW_SIZE = 2
+# Поля ключа курсора по умолчанию: дата и id самого поста.
+CURSOR_KEYS = ('pub_date', 'pk')
+
+
+def page_window(page_obj: Page, on_each_side: int = PAGE_WINDOW_SIZE):
+    """Номера страниц вокруг текущей вместо полного page_range."""
+    num_pages = page_obj.paginator.num_pages
+    start = max(page_obj.number - on_each_side, 1)
+    end = min(page_obj.number + on_each_side, num_pages)
+    return range(start, end + 1)
+
+
+def encode_cursor(post) -> str:
+    """Непрозрачный токен позиции записи по ключу (pub_date, id).
+
+    Берёт ключ, который подставила cursor_pagination, если он есть.
+    """
+    pub_date = getattr(post, 'cursor_date', post.pub_date)
+    pk = getattr(post, 'cursor_id', post.pk)
+    raw = f'{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    """Разбирает токен курсора, при ошибке возвращает None."""
+    try:
+        padding = '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(token + padding).decode()
+        pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница ленты без COUNT и OFFSET.
+
+    Повторяет интерфейс Page, который используют шаблоны:
+    итерация, len, has_next, has_previous, has_other_pages.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<Cursor page of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+def cursor_pagination(request: WSGIRequest, post_list: QuerySet,
+                      per_page: int = CONST_SHOWED_POST,
+                      keys=CURSOR_KEYS) -> CursorPage:
+    """Пагинация по ключу (pub_date, id) через ?after= и ?before=.
+
+    keys - поля с датой и id, по которым идёт ключ, например колонки
+    записи ленты вместо колонок поста. Они подставляются аннотациями:
+    так фильтр курсора не добавляет второе соединение.
+    """
+    post_list = post_list.annotate(
+        cursor_date=F(keys[0]), cursor_id=F(keys[1])
+    )
+    date_key, id_key = 'cursor_date', 'cursor_id'
+    after = decode_cursor(request.GET.get('after', ''))
+    before = decode_cursor(request.GET.get('before', ''))
+    if before is not None:
+        pub_date, pk = before
+        rows = list(
+            post_list.filter(
+                Q(**{f'{date_key}__gt': pub_date})
+                | Q(**{date_key: pub_date, f'{id_key}__gt': pk})
+            ).order_by(date_key, id_key)[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page]
+        rows.reverse()
+        return CursorPage(rows, has_next=True, has_previous=has_previous)
+    if after is not None:
+        pub_date, pk = after
+        post_list = post_list.filter(
+            Q(**{f'{date_key}__lt': pub_date})
+            | Q(**{date_key: pub_date, f'{id_key}__lt': pk})
+        )
+    rows = list(
+        post_list.order_by(f'-{date_key}', f'-{id_key}')[:per_page + 1]
+    )
+    return CursorPage(
+        rows[:per_page],
+        has_next=len(rows) > per_page,
+        has_previous=after is not None,
+    )
+
+
+def comments_after(comment_list: QuerySet, token: str,
+                   per_page: int = COMMENTS_PER_PAGE) -> CursorPage:
+    """Порция комментариев по возрастанию (pub_date, id) после курсора."""
+    after = decode_cursor(token or '')
+    if after is not None:
+        pub_date, pk = after
+        comment_list = comment_list.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        )
+    rows = list(comment_list.order_by('pub_date', 'pk')[:per_page + 1])
+    return CursorPage(
+        rows[:per_page],
+        has_next=len(rows) > per_page,
+        has_previous=after is not None,
+    )
 
 
-def pagination(request: WSGIRequest, post_list: QuerySet) -> Page:
+def pagination(request: WSGIRequest, post_list: QuerySet,
+               cursor_keys=CURSOR_KEYS) -> Page:
     """Функция добавления пагинации на страницу"""
+    if getattr(settings, 'POSTS_CURSOR_PAGINATION', False):
+        return cursor_pagination(request, post_list, keys=cursor_keys)
     paginator: Paginator = Paginator(post_list, CONST_SHOWED_POST)
     page_number: str = request.GET.get('page')
     page_obj: Page = paginator.get_page(page_number)
+    page_obj.page_window = page_window(page_obj)
     return page_obj
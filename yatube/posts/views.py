@@ -1,64 +1,113 @@
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
 
-from .utils import pagination
+from core.throttle import throttle
+
+from . import counters, follow_graph, thumbnails
+from .conditional import post_condition, post_etag
+from .feed_cache import (
+    INDEX_SCOPE, POPULAR_FOLLOW_SCOPE,
+    cache_feed, follow_scope, group_scope, profile_scope,
+)
+from .search import SearchResults
+from .timeline import timeline_feed
+from .utils import (
+    CONST_SHOWED_POST, comments_after, page_window, pagination,
+)
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
+from .models import Comment, Post, Group, User, Follow
+
+# Связи, которые читает карточка поста posts/includes/post.html.
+POST_CARD_RELATED = ('author', 'group')
 
 
-@cache_page(20)
+@cache_feed(INDEX_SCOPE)
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.select_related(*POST_CARD_RELATED)
     page_obj = pagination(request, posts)
+    thumbnails.prefetch(page_obj, thumbnails.FEED_THUMBNAIL)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@cache_feed(group_scope('{slug}'))
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('group')
+    posts = group.posts.select_related(*POST_CARD_RELATED)
     page_obj = pagination(request, posts)
+    thumbnails.prefetch(page_obj, thumbnails.FEED_THUMBNAIL)
     context = {
         'group': group,
         'page_obj': page_obj,
+        'count_group_posts': counters.get(counters.GROUP_POSTS, group.pk),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_feed(profile_scope('{username}'))
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    user = request.user
-    posts = author.posts.select_related('author')
+    posts = author.posts.select_related(*POST_CARD_RELATED)
     page_obj = pagination(request, posts)
-    count_user_posts = posts.count()
-    following = user.is_authenticated and author.following.exists()
+    thumbnails.prefetch(page_obj, thumbnails.FEED_THUMBNAIL)
+    author_counters = counters.author_counters(author.pk)
+    following = follow_graph.follows(request.user.pk, author.pk)
     context = {
         'page_obj': page_obj,
         'author': author,
-        'count_user_posts': count_user_posts,
+        'count_user_posts': author_counters['posts'],
+        'count_followers': author_counters['followers'],
+        'count_following': author_counters['following'],
         'following': following
     }
     return render(request, 'users/profile.html', context)
 
 
+@post_condition
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    count_user_posts = post.author.posts.count()
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related(*POST_CARD_RELATED), id=post_id
+    )
+    count_user_posts = counters.get(counters.AUTHOR_POSTS, post.author_id)
+    count_comments = counters.get(counters.POST_COMMENTS, post.pk)
+    comments = comments_after(
+        post.comments.select_related('author'), request.GET.get('after')
+    )
     form = CommentForm()
     context = {
         'post': post,
         'count_user_posts': count_user_posts,
+        'count_comments': count_comments,
         'comments': comments,
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@post_condition
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста HTML-фрагментом."""
+    if post_etag(request, post_id) is None:
+        raise Http404
+    comments = comments_after(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        request.GET.get('after'),
+    )
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
+@throttle('post_create')
 def post_create(request):
     form = PostForm(request.POST or None,
                     files=request.FILES or None,)
@@ -66,6 +115,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.enqueue(post)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', {'form': form})
     form = PostForm()
@@ -81,6 +131,8 @@ def post_edit(request, post_id):
                     instance=post)
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.enqueue(post)
         return redirect('posts:post_detail', post.id)
     return render(
         request,
@@ -102,6 +154,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -114,18 +167,37 @@ def add_comment(request, post_id):
 
 
 @login_required
+@cache_feed(follow_scope('{user_id}'), POPULAR_FOLLOW_SCOPE)
 def follow_index(request):
-    user = request.user
-    followed_authors = user.follower.values_list('author', flat=True)
-    posts = Post.objects.filter(author__id__in=followed_authors)
-    page_obj = pagination(request, posts)
+    posts, cursor_keys = timeline_feed(request.user)
+    posts = posts.select_related(*POST_CARD_RELATED)
+    page_obj = pagination(request, posts, cursor_keys)
+    thumbnails.prefetch(page_obj, thumbnails.FEED_THUMBNAIL)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/follow.html', context)
 
 
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    results = SearchResults(
+        query, Post.objects.select_related(*POST_CARD_RELATED)
+    )
+    page_obj = Paginator(results, CONST_SHOWED_POST).get_page(
+        request.GET.get('page')
+    )
+    page_obj.page_window = page_window(page_obj)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@throttle('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     user = request.user
@@ -136,6 +208,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@throttle('follow', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     author = User.objects.get(username=username)
     user = request.user
@@ -4,6 +4,9 @@ from django.contrib.auth.forms import (
     PasswordResetForm,
 )
 from django.contrib.auth import get_user_model
+from django.template import loader
+
+from .tasks import send_email
 
 
 User = get_user_model()
@@ -20,4 +23,16 @@ class MyChangeFormPassword(PasswordChangeForm):
 
 
 class MyResetFormPassword(PasswordResetForm):
-    ...
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        """Письмо собирается в запросе, а отправляется фоновой задачей."""
+        subject = ''.join(
+            loader.render_to_string(subject_template_name, context)
+            .splitlines()
+        )
+        body = loader.render_to_string(email_template_name, context)
+        html = None
+        if html_email_template_name is not None:
+            html = loader.render_to_string(html_email_template_name, context)
+        send_email.enqueue(subject, body, from_email, [to_email], html)
@@ -0,0 +1,12 @@
+from django.core.mail import EmailMultiAlternatives
+
+from core.tasks import task
+
+
+@task()
+def send_email(subject, body, from_email, to, html=None):
+    """Отправляет письмо, собранное в запросе."""
+    message = EmailMultiAlternatives(subject, body, from_email, to)
+    if html is not None:
+        message.attach_alternative(html, 'text/html')
+    message.send()
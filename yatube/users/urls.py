@@ -10,6 +10,7 @@ from django.contrib.auth.views import (
 )
 from django.urls import path
 from . import views
+from .forms import MyResetFormPassword
 
 
 app_name = 'users'
@@ -50,7 +51,8 @@ urlpatterns = [
     path(
         'password_reset/',
         PasswordResetView.as_view(
-            template_name='users/password_reset_form.html'
+            template_name='users/password_reset_form.html',
+            form_class=MyResetFormPassword,
         ),
         name='password_reset_form',
     ),
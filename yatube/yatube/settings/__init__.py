@@ -0,0 +1,25 @@
+"""Настройки проекта по профилям.
+
+Профиль выбирает переменная окружения YATUBE_SETTINGS_PROFILE:
+development (по умолчанию) или production. Общие настройки лежат
+в base.py, профиль дополняет и переопределяет их.
+"""
+import os
+from importlib import import_module
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('development', 'production')
+
+SETTINGS_PROFILE = os.environ.get('YATUBE_SETTINGS_PROFILE', 'development')
+if SETTINGS_PROFILE not in PROFILES:
+    raise ImproperlyConfigured(
+        f'Неизвестный профиль настроек {SETTINGS_PROFILE!r}, '
+        f'доступны: {", ".join(PROFILES)}'
+    )
+
+_profile = import_module(f'{__name__}.{SETTINGS_PROFILE}')
+globals().update(
+    (name, value) for name, value in vars(_profile).items()
+    if name.isupper()
+)
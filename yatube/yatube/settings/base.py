@@ -0,0 +1,197 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+SECRET_KEY = 'x4)naag(4dabqwihgnlje2ganj2@^)(n@fk23&nh9#7j&7%s!m'
+
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES = [
+    {
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'core.db.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переживает запрос: прагмы и кеш страниц не теряются.
+        'CONN_MAX_AGE': 600,
+    }
+}
+# Реплики только для чтения; пустой список - всё идёт в default.
+DATABASE_REPLICAS = []
+if os.environ.get('YATUBE_SQLITE_REPLICA'):
+    # Локальная реплика: файл, который обновляет manage.py replicate_db.
+    DATABASES['replica'] = {
+        'ENGINE': 'core.db.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+# View, которые только читают и могут обслуживаться репликой.
+DATABASE_REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+]
+# Сколько секунд после своей записи пользователь читает из default.
+DATABASE_STICKY_SECONDS = 15
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'L1_MAX_BYTES': 8 * 1024 * 1024,
+        },
+    }
+}
+
+# Тесты пишут кеш во временный каталог.
+TEST_RUNNER = 'core.test_runner.TemporaryCacheRunner'
+
+# Лимиты записей core.throttle: запросов за период (s, m, h, d)
+# на пользователя и на IP. Запросы с THROTTLE_EXEMPT_IPS
+# не ограничиваются.
+THROTTLE_RATES = {
+    'post_create': {'user': '10/m', 'ip': '50/m'},
+    'add_comment': {'user': '20/m', 'ip': '100/m'},
+    'follow': {'user': '30/m', 'ip': '150/m'},
+}
+THROTTLE_EXEMPT_IPS = []
+
+# Курсорная пагинация лент (?after=/?before=) вместо ?page=.
+POSTS_CURSOR_PAGINATION = False
+
+# Материализованные ленты подписок.
+TIMELINE_MAX_LENGTH = 1000
+TIMELINE_FANOUT_MAX_FOLLOWERS = 1000
+
+# Сколько живут закешированные страницы лент, сбрасываются они записями.
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Процессы команды generate_thumbnails; 0 - создавать в самой команде.
+POST_THUMBNAIL_WORKERS = 2
+
+# Очередь фоновых задач core.tasks, её выполняет manage.py run_workers.
+TASKS_WORKERS = 2
+TASKS_MAX_ATTEMPTS = 5
+# Повторы после ошибки: 10 с, 20 с, 40 с... но не реже раза в час.
+TASKS_BACKOFF_SECONDS = 10
+TASKS_BACKOFF_MAX_SECONDS = 60 * 60
+# Через сколько секунд задачу упавшего процесса забирает другой.
+TASKS_LEASE_SECONDS = 300
+
+# Загрузки всегда пишутся во временный файл, а не в память.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+# Ограничения и формат картинок постов после загрузки.
+POST_IMAGE_MAX_PIXELS = 100_000_000
+POST_IMAGE_MAX_SIZE = (2048, 2048)
+POST_IMAGE_FORMAT = 'JPEG'
+POST_IMAGE_QUALITY = 85
+
+# Замер запросов core.middleware.ServerTimingMiddleware: заголовок
+# Server-Timing и окно скользящих гистограмм в минутах.
+SERVER_TIMING_HEADER = True
+SERVER_TIMING_WINDOW_MINUTES = 15
+
+# Проверка core.checks при старте: с ошибками процесс не запускается.
+STARTUP_SELF_CHECK = False
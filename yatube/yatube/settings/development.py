@@ -0,0 +1,22 @@
+"""Профиль разработки: DEBUG и debug_toolbar."""
+from .base import *
+
+DEBUG = True
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+MIDDLEWARE = MIDDLEWARE + ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+# Локальные запросы разработки, тестов и load_test не ограничиваются.
+THROTTLE_EXEMPT_IPS = INTERNAL_IPS
@@ -0,0 +1,78 @@
+"""Боевой профиль: без отладочных приложений и их накладных расходов.
+
+Секретный ключ и имена хостов берутся из окружения:
+YATUBE_SECRET_KEY и YATUBE_ALLOWED_HOSTS (через запятую).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Не задана переменная YATUBE_SECRET_KEY')
+
+ALLOWED_HOSTS = os.environ.get(
+    'YATUBE_ALLOWED_HOSTS',
+    'dimemeslol.pythonanywhere.com,www.dimemeslol.pythonanywhere.com',
+).split(',')
+
+# Шаблоны компилируются один раз на процесс; контекстный процессор
+# debug без DEBUG ничего не добавляет, а вызывается на каждом рендере.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'context_processors': [
+            processor
+            for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+            if processor != 'django.template.context_processors.debug'
+        ],
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}]
+
+# Сессия читается из кеша, а не отдельным запросом к БД на каждый запрос.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+SECURE_CONTENT_TYPE_NOSNIFF = True
+SECURE_BROWSER_XSS_FILTER = True
+
+CACHES = {
+    'default': {
+        **CACHES['default'],
+        'OPTIONS': {
+            **CACHES['default']['OPTIONS'],
+            'L1_MAX_BYTES': 32 * 1024 * 1024,
+        },
+    }
+}
+
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+
+# Замер запросов остаётся для server_timing, но заголовок клиентам
+# не отдаётся.
+SERVER_TIMING_HEADER = False
+
+# При старте core проверяет, что отладочное ничего не включило.
+STARTUP_SELF_CHECK = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+}
@@ -2,12 +2,15 @@ from django.contrib import admin
 from django.urls import include, path
 from django.conf import settings
 
+from core.views import server_timing_stats
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('about/', include('about.urls', namespace='about')),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('stats/timing/', server_timing_stats, name='server_timing_stats'),
 ]
 handler404 = 'core.views.page_not_found'
 handler403 = 'core.views.csrf_failure'